@@ -0,0 +1,115 @@
+import time
+import argparse
+import numpy as np
+import torch
+import torch.nn as nn
+from sklearn.metrics import roc_auc_score
+
+from recurrent_models import LSTMGenerator, LSTMDiscriminator, LSTMEncoder
+from scoring import score_batch, train_encoder
+
+## Latency / AUC of the anomaly score modes on a synthetic series
+
+
+def make_windows(n_windows, window_length, anomaly_ratio=0.0, seed=2):
+    """Noisy sine windows; a share of them gets a spike and label 1"""
+    rng = np.random.default_rng(seed)
+    phase = rng.uniform(0, 2 * np.pi, size=(n_windows, 1))
+    steps = np.arange(window_length)[None, :]
+    x = 0.5 * np.sin(2 * np.pi * steps / window_length + phase)
+    x = x + rng.normal(0, 0.05, size=x.shape)
+
+    y = (rng.random(n_windows) < anomaly_ratio).astype(np.float32)
+    spikes = rng.integers(0, window_length, size=n_windows)
+    x[y == 1, spikes[y == 1]] += rng.choice([-1, 1], size=int(y.sum())) * 0.8
+
+    x = torch.from_numpy(x.astype(np.float32)).unsqueeze(-1)
+    return torch.utils.data.TensorDataset(x, torch.from_numpy(y))
+
+
+def train_gan(dataloader, in_dim, epochs, device):
+    """Short version of the TAnoGAN training loop in train.py"""
+    netD = LSTMDiscriminator(in_dim=in_dim, device=device).to(device)
+    netG = LSTMGenerator(in_dim=in_dim, out_dim=in_dim, device=device).to(device)
+    criterion = nn.BCELoss().to(device)
+    optimizerD = torch.optim.Adam(netD.parameters(), lr=0.0002)
+    optimizerG = torch.optim.Adam(netG.parameters(), lr=0.0002)
+
+    for epoch in range(epochs):
+        for x, _ in dataloader:
+            real = x.to(device)
+            ones = torch.ones(real.size(0), real.size(1), 1, device=device)
+
+            netD.zero_grad()
+            output, _ = netD(real)
+            errD_real = criterion(output, ones)
+            fake, _ = netG(torch.randn_like(real) * 0.1)
+            output, _ = netD(fake.detach())
+            errD_fake = criterion(output, torch.zeros_like(ones))
+            (errD_real + errD_fake).backward()
+            optimizerD.step()
+
+            netG.zero_grad()
+            fake, _ = netG(torch.randn_like(real) * 0.1)
+            output, _ = netD(fake)
+            criterion(output, ones).backward()
+            optimizerG.step()
+
+    return netG, netD
+
+
+def evaluate(dataloader, generator, discriminator, encoder, mode, opt, device):
+    scores, labels = list(), list()
+    start_time = time.perf_counter()
+    for x, y in dataloader:
+        score, _ = score_batch(
+            x.to(device),
+            generator,
+            discriminator,
+            encoder=encoder,
+            mode=mode,
+            steps=opt.steps,
+            refine_steps=opt.refine_steps,
+            tol=opt.tol,
+        )
+        scores.append(score.cpu())
+        labels.append(y)
+    latency = (time.perf_counter() - start_time) / len(dataloader.dataset)
+
+    auc_val = roc_auc_score(torch.cat(labels).numpy(), torch.cat(scores).numpy())
+    return latency, auc_val
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="** Anomaly score benchmark **")
+    parser.add_argument("--train-windows", type=int, default=512)
+    parser.add_argument("--test-windows", type=int, default=256)
+    parser.add_argument("--window-length", type=int, default=60)
+    parser.add_argument("--gan-epochs", type=int, default=5)
+    parser.add_argument("--encoder-epochs", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--refine-steps", type=int, default=5)
+    parser.add_argument("--tol", type=float, default=0.0)
+    opt = parser.parse_args()
+
+    torch.manual_seed(2)
+    device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+
+    train_set = make_windows(opt.train_windows, opt.window_length)
+    test_set = make_windows(opt.test_windows, opt.window_length, anomaly_ratio=0.2, seed=3)
+    train_loader = torch.utils.data.DataLoader(train_set, batch_size=opt.batch_size, shuffle=True)
+    test_loader = torch.utils.data.DataLoader(test_set, batch_size=opt.batch_size)
+
+    generator, discriminator = train_gan(train_loader, 1, opt.gan_epochs, device)
+    encoder = LSTMEncoder(in_dim=1, latent_dim=1).to(device)
+    train_encoder(
+        encoder, generator, discriminator, train_loader, epochs=opt.encoder_epochs, device=device
+    )
+
+    print(f"{'mode':>8} {'ms/window':>10} {'AUC':>6}")
+    for mode in ["latent", "encoder", "hybrid"]:
+        latency, auc_val = evaluate(
+            test_loader, generator, discriminator, encoder, mode, opt, device
+        )
+        print(f"{mode:>8} {latency * 1000:>10.3f} {auc_val:>6.3f}")
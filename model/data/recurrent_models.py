@@ -30,20 +30,27 @@ class LSTMGenerator(nn.Module):
             nn.Linear(in_features=128, out_features=out_dim), nn.Tanh()
         )
 
-    def forward(self, input):
+    def forward(self, input, state=None):
+        outputs, recurrent_features, _ = self.forward_state(input, state)
+        return outputs, recurrent_features
+
+    def forward_state(self, input, state=None):
+        """Forward that also returns the (h, c) states of the three LSTMs.
+        Passing the returned state to the next call continues the sequence;
+        without one the LSTMs start from their implicit device-side zeros.
+        """
         batch_size, seq_len = input.size(0), input.size(1)
-        h_0 = torch.zeros(1, batch_size, 32).to(self.device)
-        c_0 = torch.zeros(1, batch_size, 32).to(self.device)
+        state0, state1, state2 = state if state is not None else (None, None, None)
 
-        recurrent_features, (h_1, c_1) = self.lstm0(input, (h_0, c_0))
-        recurrent_features, (h_2, c_2) = self.lstm1(recurrent_features)
-        recurrent_features, _ = self.lstm2(recurrent_features)
+        recurrent_features, state0 = self.lstm0(input, state0)
+        recurrent_features, state1 = self.lstm1(recurrent_features, state1)
+        recurrent_features, state2 = self.lstm2(recurrent_features, state2)
 
         outputs = self.linear(
             recurrent_features.contiguous().view(batch_size * seq_len, 128)
         )
         outputs = outputs.view(batch_size, seq_len, self.out_dim)
-        return outputs, recurrent_features
+        return outputs, recurrent_features, (state0, state1, state2)
 
 
 class LSTMDiscriminator(nn.Module):
@@ -65,17 +72,51 @@ class LSTMDiscriminator(nn.Module):
         )
         self.linear = nn.Sequential(nn.Linear(100, 1), nn.Sigmoid())
 
-    def forward(self, input):
+    def forward(self, input, state=None):
+        outputs, recurrent_features, _ = self.forward_state(input, state)
+        return outputs, recurrent_features
+
+    def forward_state(self, input, state=None):
+        """Forward that also returns the (h, c) state of the LSTM"""
         batch_size, seq_len = input.size(0), input.size(1)
-        h_0 = torch.zeros(1, batch_size, 100).to(self.device)
-        c_0 = torch.zeros(1, batch_size, 100).to(self.device)
 
-        recurrent_features, _ = self.lstm(input, (h_0, c_0))
+        recurrent_features, state = self.lstm(input, state)
         outputs = self.linear(
             recurrent_features.contiguous().view(batch_size * seq_len, 100)
         )
         outputs = outputs.view(batch_size, seq_len, 1)
-        return outputs, recurrent_features
+        return outputs, recurrent_features, state
+
+
+class LSTMEncoder(nn.Module):
+    """An LSTM based encoder mapping a sequence to the generator's latent sequence.
+    Args:
+        in_dim: Input dimensionality
+        latent_dim: dimensionality of the generator's input noise
+        hidden_dim: dimensionality of the hidden layer of lstms
+    Inputs: sequence of shape (batch_size, seq_len, in_dim)
+    Output: latent of shape (batch_size, seq_len, latent_dim)
+    """
+
+    def __init__(self, in_dim, latent_dim, hidden_dim=100, device=None):
+        super().__init__()
+        self.device = device
+        self.hidden_dim = hidden_dim
+        self.latent_dim = latent_dim
+
+        self.lstm = nn.LSTM(
+            input_size=in_dim, hidden_size=hidden_dim, num_layers=1, batch_first=True
+        )
+        self.linear = nn.Linear(hidden_dim, latent_dim)
+
+    def forward(self, input):
+        batch_size, seq_len = input.size(0), input.size(1)
+
+        recurrent_features, _ = self.lstm(input)
+        outputs = self.linear(
+            recurrent_features.contiguous().view(batch_size * seq_len, self.hidden_dim)
+        )
+        return outputs.view(batch_size, seq_len, self.latent_dim)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,138 @@
+import torch
+import torch.nn.functional as F
+
+
+def anomaly_score(x, G_z, discriminator, Lambda=0.1):
+    """Per-window TAnoGAN score: residual and discrimination losses summed over each window"""
+    residual_loss = torch.sum(torch.abs(x - G_z), dim=(1, 2))  # Residual Loss
+
+    # rich intermediate feature representations for real data x and fake data G(z)
+    _, x_feature = discriminator(x)
+    _, G_z_feature = discriminator(G_z)
+
+    discrimination_loss = torch.sum(torch.abs(x_feature - G_z_feature), dim=(1, 2))
+    return (1 - Lambda) * residual_loss + Lambda * discrimination_loss
+
+
+def search_latent(x, generator, discriminator, steps=50, lr=1e-2, tol=1e-4, Lambda=0.1, z=None):
+    """Optimize one latent z per window of the batch `x` at once
+
+    Each window keeps its own loss; a window stops once its loss changes by
+    less than `tol` (relative) between two steps, and only the windows still
+    converging are run through the networks. Returns the final per-window
+    anomaly scores and latents.
+    """
+    if z is None:
+        z = torch.empty_like(x).normal_(mean=0, std=0.1)
+    z = z.detach().clone().requires_grad_(True)
+    z_optimizer = torch.optim.Adam([z], lr=lr)
+
+    scores = torch.zeros(x.size(0), device=x.device)
+    previous = torch.full_like(scores, float("inf"))
+    active = torch.ones(x.size(0), dtype=torch.bool, device=x.device)
+
+    for j in range(steps):
+        idx = active.nonzero(as_tuple=True)[0]
+        gen_fake, _ = generator(z[idx])
+        loss = anomaly_score(x[idx], gen_fake, discriminator, Lambda)
+
+        current = loss.detach()
+        scores[idx] = current
+        converged = (previous[idx] - current).abs() <= tol * current.abs()
+        previous[idx] = current
+
+        active[idx[converged]] = False
+        if j == steps - 1 or not active.any():
+            break
+
+        # Gradients w.r.t. z only; the networks' parameters stay untouched
+        (z_grad,) = torch.autograd.grad(loss.sum(), z)
+        z.grad = z_grad
+        frozen = z.detach()[~active].clone()
+        z_optimizer.step()
+        with torch.no_grad():
+            # Adam momentum would keep moving converged latents
+            z[~active] = frozen
+
+    return scores, z.detach()
+
+
+def encode_latent(x, generator, discriminator, encoder, Lambda=0.1):
+    """Score windows in one pass, with z = encoder(x) instead of a latent search"""
+    with torch.no_grad():
+        z = encoder(x)
+        gen_fake, _ = generator(z)
+        scores = anomaly_score(x, gen_fake, discriminator, Lambda)
+    return scores, z
+
+
+def score_batch(
+    x,
+    generator,
+    discriminator,
+    encoder=None,
+    mode="latent",
+    steps=50,
+    refine_steps=5,
+    lr=1e-2,
+    tol=1e-4,
+    Lambda=0.1,
+):
+    """Per-window anomaly scores of the batch `x`
+
+    mode "latent" searches z from noise for `steps` steps, "encoder" scores
+    G(encoder(x)) in a single forward, and "hybrid" starts the search from
+    encoder(x) and refines it for `refine_steps` steps only.
+    """
+    if mode == "latent":
+        return search_latent(x, generator, discriminator, steps, lr, tol, Lambda)
+
+    if encoder is None:
+        raise ValueError(f"Score mode '{mode}' needs a trained encoder")
+
+    if mode == "encoder":
+        return encode_latent(x, generator, discriminator, encoder, Lambda)
+
+    if mode == "hybrid":
+        with torch.no_grad():
+            z = encoder(x)
+        return search_latent(x, generator, discriminator, refine_steps, lr, tol, Lambda, z=z)
+
+    raise ValueError(f"Unknown score mode '{mode}'")
+
+
+def train_encoder(encoder, generator, discriminator, dataloader, epochs=10, lr=1e-3, kappa=1.0, device=None):
+    """Fit encoder: x -> z against a trained, frozen generator and discriminator
+
+    The loss is the residual between x and G(E(x)) plus `kappa` times the
+    distance of their discriminator features (izi_f training).
+    """
+    frozen = [p for net in (generator, discriminator) for p in net.parameters()]
+    requires_grad = [p.requires_grad for p in frozen]
+    for p in frozen:
+        p.requires_grad_(False)
+
+    optimizer = torch.optim.Adam(encoder.parameters(), lr=lr)
+    try:
+        for epoch in range(epochs):
+            running_loss = 0.0
+            for i, (x, _) in enumerate(dataloader):
+                x = x.to(device)
+                gen_fake, _ = generator(encoder(x))
+                _, x_feature = discriminator(x)
+                _, G_z_feature = discriminator(gen_fake)
+
+                loss = F.mse_loss(gen_fake, x) + kappa * F.mse_loss(G_z_feature, x_feature)
+
+                optimizer.zero_grad()
+                loss.backward()
+                optimizer.step()
+                running_loss += loss.item()
+
+            print(f"[{epoch + 1}/{epochs}] Encoder loss: {running_loss / (i + 1):.4f}", end="\r")
+        print()
+    finally:
+        for p, flag in zip(frozen, requires_grad):
+            p.requires_grad_(flag)
+
+    return encoder
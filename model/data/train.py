@@ -10,7 +10,8 @@ import torch.nn.init as init
 from torch.autograd import Variable
 import datetime
 from nab_data import NabDataset
-from recurrent_models import LSTMGenerator, LSTMDiscriminator
+from recurrent_models import LSTMGenerator, LSTMDiscriminator, LSTMEncoder
+from scoring import score_batch, train_encoder
 from data_setting import DataSettings
 import pandas as pd
 
@@ -35,7 +36,14 @@ class ArgsTrn:
 
 class ArgsTest:
     workers = 1
-    batch_size = 1
+    batch_size = 64
+    latent_steps = 50
+    latent_lr = 1e-2
+    latent_tol = 1e-4
+    score_mode = "latent"  # "latent", "encoder" or "hybrid"
+    refine_steps = 5
+    encoder_epochs = 10
+    encoder_lr = 1e-3
 
 
 def main():
@@ -162,54 +170,39 @@ def main():
     generator = netG  # changing reference variable
     discriminator = netD  # changing reference variable
 
-    def Anomaly_score(x, G_z, Lambda=0.1):
-        residual_loss = torch.sum(torch.abs(x - G_z))  # Residual Loss
-
-        # x_feature is a rich intermediate feature representation for real data x
-        output, x_feature = discriminator(x.to(device))
-        # G_z_feature is a rich intermediate feature representation for fake data G(z)
-        output, G_z_feature = discriminator(G_z.to(device))
-
-        discrimination_loss = torch.sum(
-            torch.abs(x_feature - G_z_feature)
-        )  # Discrimination loss
-
-        total_loss = (1 - Lambda) * residual_loss.to(
-            device
-        ) + Lambda * discrimination_loss
-        return total_loss
+    encoder = None
+    if opt_test.score_mode != "latent":
+        # Learn x -> z after the GAN so windows score in one forward pass
+        encoder = LSTMEncoder(in_dim=in_dim, latent_dim=in_dim).to(device)
+        train_encoder(
+            encoder,
+            generator,
+            discriminator,
+            dataloader,
+            epochs=opt_test.encoder_epochs,
+            lr=opt_test.encoder_lr,
+            device=device,
+        )
 
     loss_list = []
     # y_list = []
     for i, (x, y) in enumerate(test_dataloader):
-        print(i, y)
-
-        z = Variable(
-            init.normal(
-                torch.zeros(
-                    opt_test.batch_size,
-                    test_dataset.window_length,
-                    test_dataset.n_feature,
-                ),
-                mean=0,
-                std=0.1,
-            ),
-            requires_grad=True,
+        scores, _ = score_batch(
+            x.to(device),
+            generator,
+            discriminator,
+            encoder=encoder,
+            mode=opt_test.score_mode,
+            steps=opt_test.latent_steps,
+            refine_steps=opt_test.refine_steps,
+            lr=opt_test.latent_lr,
+            tol=opt_test.latent_tol,
         )
-        # z = x
-        z_optimizer = torch.optim.Adam([z], lr=1e-2)
-
-        loss = None
-        for j in range(50):  # set your interation range
-            gen_fake, _ = generator(z.cuda())
-            loss = Anomaly_score(Variable(x).cuda(), gen_fake)
-            loss.backward()
-            z_optimizer.step()
+        loss_list.append(scores.cpu())  # Store the final loss of each window
+        print(f"[{i + 1}/{len(test_dataloader)}] mean score={scores.mean():.4f}", end="\r")
+    print()
 
-        loss_list.append(loss)  # Store the loss from the final iteration
-        # y_list.append(y) # Store the corresponding anomaly label
-        print("~~~~~~~~loss={},  y={} ~~~~~~~~~~".format(loss, y))
-        # break
+    loss_list = torch.cat(loss_list)
 
     THRESHOLD = (
         12.2  # Anomaly score threshold for an instance to be considered as anomaly
@@ -217,9 +210,7 @@ def main():
 
     # TIME_STEPS = dataset.window_length
     test_score_df = pd.DataFrame(index=range(test_dataset.data_len))
-    test_score_df["loss"] = [
-        loss.item() / test_dataset.window_length for loss in loss_list
-    ]
+    test_score_df["loss"] = (loss_list / test_dataset.window_length).numpy()
     test_score_df["y"] = test_dataset.y
     test_score_df["threshold"] = THRESHOLD
     test_score_df["anomaly"] = test_score_df.loss > test_score_df.threshold
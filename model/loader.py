@@ -7,7 +7,7 @@ import seaborn as sns
 from sklearn.model_selection import train_test_split
 
 from model.utils.command import request_user_input
-from model.utils.file import open_csv, open_json
+from model.utils.file import FILE_READERS, open_json
 from model.utils.logger import Logger
 from model.meta import init_set_info, init_col_info
 
@@ -42,9 +42,9 @@ class DataLoader(object):
         self.logger.log(f"- '{self.filepath}' is now loading...", level=2)
 
         dataset = {
-            "train": self.read_csv("train"),
-            "valid": self.read_csv("valid"),
-            "test": self.read_csv("test"),
+            "train": self.read_dataset("train"),
+            "valid": self.read_dataset("valid"),
+            "test": self.read_dataset("test"),
         }
 
         if dataset["test"] is None:
@@ -52,20 +52,38 @@ class DataLoader(object):
 
         return dataset
 
-    def read_csv(self, name):
+    def read_dataset(self, name):
         filepath = os.path.join(self.basepath, self.filepath, name + "." + self.format)
 
         index_col = self.config["dataset"].get("index", None)
         index_col = index_col if index_col != "None" else None
 
+        columns = self.config["dataset"].get("columns", None)
+        if columns is not None and index_col is not None and index_col not in columns:
+            columns = [index_col] + columns
+
+        filters = None
+        time_range = self.config["dataset"].get("time_range", None)
+        if time_range is not None and index_col is not None:
+            start, end = pd.to_datetime(time_range[0]), pd.to_datetime(time_range[1])
+            filters = [(index_col, ">=", start), (index_col, "<=", end)]
+
+        if self.format not in FILE_READERS:
+            raise ValueError(f"Unsupported dataset format '{self.format}'")
+
         try:
-            csv_file = open_csv(filepath=filepath, index_col=index_col)
-            self.logger.log(f"- {name:5} data{csv_file.shape} is now loaded", level=3)
+            data_file = FILE_READERS[self.format](
+                filepath=filepath,
+                index_col=index_col,
+                columns=columns,
+                filters=filters,
+            )
+            self.logger.log(f"- {name:5} data{data_file.shape} is now loaded", level=3)
 
         except FileNotFoundError:
-            csv_file = None
+            data_file = None
 
-        return csv_file
+        return data_file
 
     def split_dataset(self, dataset, origin, target):
         split_ratio = self.config["dataset"]["split_ratio"]
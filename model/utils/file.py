@@ -2,11 +2,59 @@ import json
 import pandas as pd
 
 
-def open_csv(filepath, index_col=None, forced=False):
-    csv_file = pd.read_csv(filepath, index_col=index_col)
+def open_csv(filepath, index_col=None, forced=False, columns=None, filters=None):
+    csv_file = pd.read_csv(filepath, index_col=index_col, usecols=columns)
+    csv_file = filter_frame(csv_file, filters)
     return csv_file
 
 
+def open_parquet(filepath, index_col=None, forced=False, columns=None, filters=None):
+    # Projection and row filters are pushed down to the parquet scan
+    parquet_file = pd.read_parquet(filepath, columns=columns, filters=filters)
+    if index_col is not None:
+        parquet_file = parquet_file.set_index(index_col)
+    return parquet_file
+
+
+def open_feather(filepath, index_col=None, forced=False, columns=None, filters=None):
+    feather_file = pd.read_feather(filepath, columns=columns)
+    feather_file = filter_frame(feather_file, filters)
+    if index_col is not None:
+        feather_file = feather_file.set_index(index_col)
+    return feather_file
+
+
+def filter_frame(frame, filters=None):
+    """Apply pyarrow style [(column, op, value), ...] filters to a loaded frame"""
+    if filters is None:
+        return frame
+
+    ops = {
+        "==": lambda x, v: x == v,
+        "!=": lambda x, v: x != v,
+        "<": lambda x, v: x < v,
+        "<=": lambda x, v: x <= v,
+        ">": lambda x, v: x > v,
+        ">=": lambda x, v: x >= v,
+    }
+
+    mask = True
+    for col, op, value in filters:
+        values = frame.index if col == frame.index.name else frame[col]
+        if isinstance(value, pd.Timestamp):
+            values = pd.to_datetime(values)
+        mask = mask & ops[op](values, value)
+
+    return frame[mask]
+
+
+FILE_READERS = {
+    "csv": open_csv,
+    "parquet": open_parquet,
+    "feather": open_feather,
+}
+
+
 def open_json(filepath, forced=False):
     json_data = json.load(open(filepath))
     return json_data
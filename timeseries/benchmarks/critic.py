@@ -0,0 +1,77 @@
+import time
+import argparse
+import tempfile
+import torch
+from torch.autograd import grad as torch_grad
+
+from timeseries.core import BandGAN
+from timeseries.benchmarks.synthetic import make_config
+
+
+def legacy_critic_step(model):
+    """Critic step as done before `BandGAN.critic_step`, kept for comparison"""
+    dataset, netD = model.dataset, model.netD
+    y, x = dataset.get_samples(model.netG, shape=model.shape, cond=model.cond)
+
+    Dx = netD(x)
+    DGz = netD(y)
+    model.optimizerD.zero_grad()
+
+    with torch.backends.cudnn.flags(enabled=False):
+        alpha = torch.rand((x.size(0), 1, 1), requires_grad=True)
+        alpha = alpha.expand_as(x).to(model.device)
+        interpolates = (alpha * x.data + (1 - alpha) * y.data).to(model.device)
+        D_interpolates = netD(interpolates)
+        fake = torch.ones(D_interpolates.size()).to(model.device)
+        gradients = torch_grad(
+            outputs=D_interpolates,
+            inputs=interpolates,
+            grad_outputs=fake,
+            create_graph=True,
+            retain_graph=True,
+            only_inputs=True,
+        )[0]
+        gradients = gradients.view(gradients.size(0), -1)
+        grad_penalty = model.gp_weight * ((gradients.norm(2, dim=1) - 1) ** 2).mean()
+
+    loss_D = DGz.mean() - Dx.mean() + grad_penalty
+    loss_D.backward()
+    model.optimizerD.step()
+    return loss_D, grad_penalty
+
+
+def measure(model, step, steps, warmup=3):
+    for _ in range(warmup):
+        step()
+    model._sync()
+
+    start_time = time.perf_counter()
+    for _ in range(steps):
+        step()
+    model._sync()
+    return (time.perf_counter() - start_time) / steps
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="** Critic step benchmark **")
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--seq-len", type=int, default=60)
+    parser.add_argument("--hidden-dim", type=int, default=64)
+    opt = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        config = make_config(
+            workdir,
+            seq_len=opt.seq_len,
+            batch_size=opt.batch_size,
+            hidden_dim=opt.hidden_dim,
+        )
+        model = BandGAN(config=config)
+
+        legacy = measure(model, lambda: legacy_critic_step(model), opt.steps)
+        fused = measure(model, model.critic_step, opt.steps)
+
+    print(f"legacy critic step : {legacy * 1000:8.2f} ms")
+    print(f"fused critic step  : {fused * 1000:8.2f} ms")
+    print(f"speedup            : {legacy / fused:8.2f}x")
@@ -0,0 +1,61 @@
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from timeseries.datasets import label_spans
+
+
+def naive_labels(times, spans):
+    """Reference O(rows x spans) labeling, as done before `label_spans`"""
+    label = np.zeros(len(times))
+    for span in spans:
+        start = pd.to_datetime(span[0])
+        end = pd.to_datetime(span[1])
+        label[(times >= start) & (times <= end)] = 1.0
+    return label
+
+
+def make_case(n_rows, n_spans, span_len, seed=31):
+    rng = np.random.default_rng(seed)
+    times = pd.date_range("2021-01-01", periods=n_rows, freq="min")
+    starts = rng.integers(0, n_rows - span_len, size=n_spans)
+    spans = [
+        [str(times[s]), str(times[s + rng.integers(1, span_len)])] for s in starts
+    ]
+    return times.values, spans
+
+
+def measure(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+def run(rows, spans, span_len, naive=True):
+    print(f"{'rows':>10} {'spans':>8} {'searchsorted':>14} {'naive':>10}")
+    for n_rows in rows:
+        for n_spans in spans:
+            times, case = make_case(n_rows, n_spans, span_len)
+            fast = measure(label_spans, times, case)
+
+            slow = float("nan")
+            if naive:
+                slow = measure(naive_labels, times, case, repeat=1)
+                assert np.array_equal(label_spans(times, case), naive_labels(times, case))
+
+            print(f"{n_rows:>10} {n_spans:>8} {fast * 1e3:>12.2f}ms {slow * 1e3:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="** Anomaly labeling benchmark **")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 525_600])
+    parser.add_argument("--spans", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--span-len", type=int, default=1440, help="max span length in rows")
+    parser.add_argument("--no-naive", action="store_true", help="skip the reference loop")
+    opt = parser.parse_args()
+
+    run(opt.rows, opt.spans, opt.span_len, naive=not opt.no_naive)
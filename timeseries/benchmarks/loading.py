@@ -0,0 +1,51 @@
+import os
+import time
+import copy
+import argparse
+import tempfile
+import torch
+
+from timeseries.benchmarks.synthetic import make_config
+from timeseries.datasets import TimeseriesDataset
+
+
+def load(config):
+    start_time = time.perf_counter()
+    dataset = TimeseriesDataset(copy.deepcopy(config), torch.device("cpu"))
+    return dataset, time.perf_counter() - start_time
+
+
+def same_series(a, b):
+    return torch.equal(a.data.nan_to_num(), b.data.nan_to_num()) and (a.time == b.time).all()
+
+
+def run(lengths, chunksize, seq_len):
+    """Cold and warm loading of the full and chunked paths, through a relative cache path"""
+    print(f"{'rows':>10} {'path':>8} {'cold':>10} {'warm':>10}")
+    for length in lengths:
+        with tempfile.TemporaryDirectory() as workdir:
+            cwd = os.getcwd()
+            os.chdir(workdir)
+            try:
+                for name, chunks in (("full", None), ("chunked", chunksize)):
+                    config = make_config(
+                        "data", length=length, seq_len=seq_len, chunksize=chunks, cache=f"cache-{name}"
+                    )["dataset"]
+
+                    cold, cold_sec = load(config)
+                    warm, warm_sec = load(config)
+                    assert same_series(cold, warm), f"{name} : cached series differs from the loaded one"
+
+                    print(f"{length:>10} {name:>8} {cold_sec * 1e3:>8.1f}ms {warm_sec * 1e3:>8.1f}ms")
+            finally:
+                os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="** Dataset loading benchmark **")
+    parser.add_argument("--length", type=int, nargs="+", default=[10_000, 100_000], help="series lengths")
+    parser.add_argument("--chunksize", type=int, default=10_000)
+    parser.add_argument("--seq-len", type=int, default=60)
+    opt = parser.parse_args()
+
+    run(opt.length, opt.chunksize, opt.seq_len)
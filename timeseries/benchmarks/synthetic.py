@@ -0,0 +1,61 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+
+def feature_names(n_feature):
+    return ["value"] + [f"value_{i}" for i in range(1, n_feature)]
+
+
+def make_series(path, length, n_feature=1, freq="min", seed=31):
+    """Write a noisy daily-seasonal series of `length` rows as CSV"""
+    rng = np.random.default_rng(seed)
+    steps = np.arange(length)
+    season = np.sin(2 * np.pi * steps / 1440)[:, None]
+    values = 50 + 10 * season + rng.normal(0, 1, size=(length, n_feature))
+
+    data = pd.DataFrame(values, columns=feature_names(n_feature))
+    data.insert(0, "timestamp", pd.date_range("2021-01-01", periods=length, freq=freq))
+    data.to_csv(path, index=False)
+    return path
+
+
+def make_config(
+    workdir, length=10_000, seq_len=60, batch_size=32, hidden_dim=64, critic=5, n_feature=1, seed=31, **dataset
+):
+    """BandGAN config over a synthetic series written into `workdir`"""
+    os.makedirs(workdir, exist_ok=True)
+    make_series(os.path.join(workdir, "series.csv"), length, n_feature=n_feature, seed=seed)
+    with open(os.path.join(workdir, "anomaly.json"), mode="w") as f:
+        json.dump({"anomalies": []}, f)
+
+    return {
+        "dataset": {
+            "path": workdir,
+            "data": "series.csv",
+            "anomaly": "anomaly.json",
+            "index": "timestamp",
+            "features": feature_names(n_feature),
+            "workers": 0,
+            "stride": 1,
+            "seq_len": seq_len,
+            "shuffle": True,
+            "batch_size": batch_size,
+            "hidden_dim": hidden_dim,
+            **dataset,
+        },
+        "model": {
+            "save": {"opt": False, "interval": 100},
+            "load": False,
+            "tag": "bench",
+            "path": workdir,
+            "interval": 100,
+        },
+        "train": {
+            "learning_rate": {"base": 1e-4, "gammaG": 1.0, "gammaD": 1.0},
+            "epochs": {"base": 0, "iter": 1, "critic": critic},
+            "wgan": {"gp_weight": 10, "cond": seq_len // 2},
+        },
+        "print": {"verbose": 0, "newline": 10},
+    }
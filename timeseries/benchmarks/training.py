@@ -0,0 +1,164 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import multiprocessing as mp
+import numpy as np
+import torch
+
+from timeseries.benchmarks.synthetic import make_config
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process, None where unsupported"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def set_seed(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+def run_case(case):
+    """Build and train one configuration; runs in a fresh process for peak RSS"""
+    from timeseries.core import BandGAN
+    from timeseries.datasets import TimeseriesDataset
+
+    if case["threads"] is not None:
+        torch.set_num_threads(case["threads"])
+
+    with tempfile.TemporaryDirectory() as workdir:
+        config = make_config(
+            workdir,
+            length=case["length"],
+            seq_len=case["seq_len"],
+            batch_size=case["batch_size"],
+            hidden_dim=case["hidden_dim"],
+            critic=case["critic"],
+            n_feature=case["n_feature"],
+            seed=case["seed"],
+        )
+        config["train"]["epochs"]["iter"] = case["epochs"]
+        config["train"]["profile"] = {"output": os.path.join(workdir, "profile.json")}
+
+        start_time = time.perf_counter()
+        TimeseriesDataset(config["dataset"], torch.device("cpu"))
+        dataset_time = time.perf_counter() - start_time
+
+        set_seed(case["seed"])
+        model = BandGAN(config=config)
+
+        start_time = time.perf_counter()
+        model.train()
+        model._sync()
+        train_time = time.perf_counter() - start_time
+
+    # the training loop's own phases : critic.*, generator.*, batch.D / G, dataloader
+    profile = model.profiler.summary()
+    counters = profile["counters"]
+    critic_steps = counters.get("critic.steps", 0)
+    steps = critic_steps + counters.get("batches", 0)
+    samples = critic_steps * case["batch_size"] + counters.get("windows", 0)
+
+    return {
+        **case,
+        "dataset_sec": dataset_time,
+        "train_sec": train_time,
+        "steps": steps,
+        "steps_per_sec": steps / train_time,
+        "samples_per_sec": samples / train_time,
+        "phase_sec": {name: stat["total_sec"] for name, stat in profile["phases"].items()},
+        "phase_calls": {name: stat["calls"] for name, stat in profile["phases"].items()},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "torch": torch.__version__,
+        "numpy": np.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "cuda": torch.cuda.is_available(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def compare(results, baseline):
+    """Print throughput ratios against a previous result file"""
+    key = lambda r: (r["length"], r["n_feature"], r["seq_len"], r["batch_size"], r["hidden_dim"])
+    previous = {key(r): r for r in baseline["results"]}
+    for r in results:
+        base = previous.get(key(r))
+        if base is None:
+            continue
+        print(
+            f"length {r['length']:>9d} : steps/sec x{r['steps_per_sec'] / base['steps_per_sec']:5.2f}"
+            f" : dataset x{base['dataset_sec'] / r['dataset_sec']:5.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="** BandGAN training benchmark **")
+    parser.add_argument("--length", type=int, nargs="+", default=[10_000, 100_000], help="series lengths")
+    parser.add_argument("--n-feature", type=int, default=1)
+    parser.add_argument("--seq-len", type=int, default=60)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--hidden-dim", type=int, default=64)
+    parser.add_argument("--critic", type=int, default=5)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=31)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    parser.add_argument("-o", "--output", type=str, default="benchmark.json", help="result file")
+    parser.add_argument("--baseline", type=str, default=None, help="previous result file to compare with")
+    opt = parser.parse_args()
+
+    cases = [
+        {
+            "length": length,
+            "n_feature": opt.n_feature,
+            "seq_len": opt.seq_len,
+            "batch_size": opt.batch_size,
+            "hidden_dim": opt.hidden_dim,
+            "critic": opt.critic,
+            "epochs": opt.epochs,
+            "seed": opt.seed,
+            "threads": opt.threads,
+        }
+        for length in opt.length
+    ]
+
+    # one fresh process per case keeps peak RSS and warm caches separate
+    context = mp.get_context("spawn")
+    results = list()
+    for case in cases:
+        with context.Pool(1) as pool:
+            result = pool.apply(run_case, (case,))
+        results.append(result)
+        phases = " ".join(f"{k} {v:.2f}s" for k, v in result["phase_sec"].items())
+        print(
+            f"length {case['length']:>9d} : dataset {result['dataset_sec']:6.2f}s"
+            f" : {result['steps_per_sec']:8.1f} steps/sec : {result['samples_per_sec']:9.1f} samples/sec"
+            f" : rss {result['peak_rss_mb'] or float('nan'):7.1f} MB : {phases}"
+        )
+
+    with open(opt.output, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+
+    if opt.baseline is not None:
+        with open(opt.baseline) as f:
+            compare(results, json.load(f))
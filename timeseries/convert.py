@@ -0,0 +1,52 @@
+import os
+import argparse
+
+from timeseries.logger import Logger
+from timeseries.utils.reader import convert_csv
+
+logger = Logger(__file__)
+
+EXTENSIONS = {"parquet": ".parquet", "feather": ".feather"}
+
+
+def find_csv(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for file in sorted(files):
+                    if file.lower().endswith(".csv"):
+                        yield os.path.join(root, file)
+        else:
+            yield path
+
+
+def convert(opt):
+    for path in find_csv(opt.paths):
+        target = os.path.splitext(path)[0] + EXTENSIONS[opt.format]
+        if os.path.exists(target) and not opt.overwrite:
+            logger.info(f"Skipped '{path}' : '{target}' already exists")
+            continue
+
+        dtypes = convert_csv(
+            path,
+            target,
+            index=opt.index,
+            time_format=opt.time_format,
+            float32=opt.float32,
+            format=opt.format,
+        )
+        columns = ", ".join(f"{col}:{dtype}" for col, dtype in dtypes.items())
+        logger.info(f"Converted '{path}' -> '{target}' ({columns})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="** CSV to columnar dataset converter **")
+    parser.add_argument("paths", nargs="+", help="CSV files or directories to convert")
+    parser.add_argument("-f", "--format", choices=list(EXTENSIONS), default="parquet")
+    parser.add_argument("-i", "--index", type=str, default="timestamp", help="time column")
+    parser.add_argument("--time-format", type=str, default=None, help="strptime format of the time column")
+    parser.add_argument("--float32", action="store_true", help="downcast float columns to float32")
+    parser.add_argument("--overwrite", action="store_true", help="replace existing converted files")
+    opt = parser.parse_args()
+
+    convert(opt)
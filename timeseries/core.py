@@ -7,16 +7,28 @@ import torch.nn as nn
 import torch.optim as optim
 from torch.autograd import grad as torch_grad
 import numpy as np
-import pandas as pd
 
 from timeseries.args import init_arguments
 from timeseries.logger import Logger
 from timeseries.bandgan import BandGAN
 from timeseries.datasets import TimeseriesDataset
-from timeseries.layers.LSTMGAN import LSTMGenerator, LSTMDiscriminator
+from timeseries.layers.LSTMGAN import LSTMGenerator, LSTMDiscriminator, training_forward
+from timeseries.utils.metrics import MetricBuffer
+from timeseries.utils.band import BANDS, compute_bands
+from timeseries.utils.checkpoint import CheckpointManager, set_rng_state
+from timeseries.utils.profiler import Profiler
+from timeseries.utils.sampler import WindowBatches
+from timeseries.distributed import (
+    init_distributed,
+    broadcast_module,
+    broadcast_value,
+    seed_rank,
+    average_gradients,
+    all_reduce_mean,
+)
 
 from utils.loss import GANLoss
-from utils.visualize import Dashboard
+from utils.live import LiveDashboard, SampleLog
 
 
 logger = Logger(__file__)
@@ -31,6 +43,8 @@ class BandGAN:
 
     def __init__(self, config=None):
         # Config option
+        self.rank, self.world_size = init_distributed(backend="gloo")
+        self.is_main = self.rank == 0
         self.device = self.init_device()
         config = self.set_config(config=config)
 
@@ -38,14 +52,24 @@ class BandGAN:
         self.dataset = TimeseriesDataset(config["dataset"], self.device)
         self.dataloader = self.init_dataloader(self.dataset)
         (self.netG, self.netD) = self.init_model()
+        self.init_forward()
 
         self.batch_size = self.dataset.batch_size
         self.seq_len = self.dataset.seq_len
         self.in_dim = self.dataset.n_feature
         self.shape = (self.batch_size, self.seq_len, self.in_dim)
+        self.init_buffers()
 
-        self.losses = {"G": [], "D": [], "l1": 0.0, "l2": 0.0, "GP": []}
-        self.visual = True if self.batch_size == 1 else False
+        self.losses = MetricBuffer(
+            ["D", "GP", "G", "l1", "l2"],
+            capacity=self.iter_epochs - self.base_epochs,
+            device=self.device,
+        )
+        self.running_loss = MetricBuffer(
+            ["D", "G", "l1", "l2", "GP"], capacity=len(self.dataloader), device=self.device
+        )
+        self.history = list()
+        self.visual = True if self.batch_size == 1 and self.is_main else False
 
     def set_config(self, config=None):
         if config is None:
@@ -78,10 +102,15 @@ class BandGAN:
         
         self.gp_weight = train_cfg["wgan"]["gp_weight"]
         self.cond = train_cfg["wgan"]["cond"]
+
+        self.precision = train_cfg.get("precision", "float32")
+        self.compile = train_cfg.get("compile", False)
+        self.profiler = Profiler.from_config(train_cfg.get("profile"))
         
         # Print option
-        self.print_verbose = print_cfg["verbose"]
+        self.print_verbose = print_cfg["verbose"] if self.is_main else 0
         self.print_newline = print_cfg["newline"]
+        self.print_fps = print_cfg.get("fps", 4)
         
         return config
 
@@ -92,18 +121,30 @@ class BandGAN:
 
         device = torch.device("cpu")
 
-        if torch.cuda.is_available():
+        # distributed training runs on the cpu with the gloo backend
+        if torch.cuda.is_available() and self.world_size == 1:
             device = torch.device("cuda:0")
 
-        logger.info(f"Set torch device `{device}`")
+        logger.info(f"Set torch device `{device}` : world size {self.world_size}")
         return device
 
     def init_dataloader(self, dataset):
-        dataloader = torch.utils.data.DataLoader(
+        # the live dashboard follows the series in time order
+        shuffle = dataset.shuffle and dataset.batch_size != 1
+
+        # every rank shuffles with the same seed and reads its own shard
+        # with a per-rank batch_size
+        seed = broadcast_value(int(torch.randint(2 ** 31 - 1, (1,)).item()))
+
+        dataloader = WindowBatches(
             dataset,
             batch_size=dataset.batch_size,
-            # shuffle=dataset.shuffle,
-            num_workers=dataset.workers,
+            shuffle=shuffle,
+            device=self.device,
+            prefetch=dataset.prefetch,
+            rank=self.rank,
+            world_size=self.world_size,
+            seed=seed,
         )
         return dataloader
 
@@ -114,6 +155,14 @@ class BandGAN:
         self.optimizerD = optim.RMSprop(netD.parameters(), lr=self.lr * self.lr_gammaD)
         self.optimizerG = optim.RMSprop(netG.parameters(), lr=self.lr * self.lr_gammaG)
 
+        if self.resume_state is not None:
+            self.resume(self.resume_state)
+
+        if self.world_size > 1:
+            broadcast_module(netG)
+            broadcast_module(netD)
+            seed_rank(self.rank, self.base_epochs)
+
         # Set Criterion
         self.criterion_adv = GANLoss(real_label=0.9, fake_label=0.1).to(self.device)
         self.criterion_l1n = nn.SmoothL1Loss().to(self.device)
@@ -121,13 +170,44 @@ class BandGAN:
                 
         return (netG, netD)
 
+    def init_forward(self):
+        """Training forwards of G and D with the configured precision / compile mode"""
+        self.runG = training_forward(self.netG, self.precision, self.compile)
+        self.runD = training_forward(self.netD, self.precision, self.compile)
+        logger.info(f"Training mode : precision {self.precision} : compile {self.compile}")
+
+    def init_buffers(self):
+        """Preallocate the device tensors refilled on every critic step"""
+        self.noise = torch.empty(self.shape, device=self.device)
+        self.alpha = torch.empty((self.batch_size, 1, 1), device=self.device)
+        self.gp_ones = None
+        self.batches = None
+
+    def real_batch(self):
+        """Random real windows for the critic and G steps, prefetched"""
+        if self.batches is None:
+            self.batches = self.dataloader.stream(self.batch_size)
+        return next(self.batches)
+
     def load_model(self, load_option=False):
         hidden_dim = self.dataset.hidden_dim
         in_dim = self.dataset.n_feature
         device = self.device
         
+        netG = LSTMGenerator(in_dim, out_dim=in_dim, hidden_dim=hidden_dim, device=device).to(device)
+        netD = LSTMDiscriminator(in_dim, hidden_dim=hidden_dim, device=device).to(device)
+
+        self.resume_state = None
         if load_option is True:
             logger.info("Loading Pretrained Models..")
+            checkpoint_path = os.path.join(self.model_path, f"bandgan_{self.model_tag}.pth")
+            if os.path.exists(checkpoint_path):
+                logger.info(f" - Loaded checkpoint : {checkpoint_path}")
+                self.resume_state = torch.load(checkpoint_path, map_location=device)
+                netG.load_state_dict(self.resume_state["netG"])
+                netD.load_state_dict(self.resume_state["netD"])
+                return (netG, netD)
+
             netG_path = os.path.join(self.model_path, f"netG_{self.model_tag}.pth")
             netD_path = os.path.join(self.model_path, f"netD_{self.model_tag}.pth")
             if os.path.exists(netG_path) and os.path.exists(netD_path):
@@ -136,188 +216,298 @@ class BandGAN:
             else:
                 logger.info(f"Pretrained Model File ('{netG_path}', '{netD_path}') is not found")
 
-        netG = LSTMGenerator(in_dim, out_dim=in_dim, hidden_dim=hidden_dim, device=device).to(device)
-        netD = LSTMDiscriminator(in_dim, hidden_dim=hidden_dim, device=device).to(device)
-        return (netG, netD)       
+        return (netG, netD)
+
+    def resume(self, state):
+        """Continue from a checkpoint : optimizers, epoch and RNG state"""
+        self.optimizerG.load_state_dict(state["optimizerG"])
+        self.optimizerD.load_state_dict(state["optimizerD"])
+        set_rng_state(state["rng"])
+        if "sampler" in state:
+            self.dataloader.load_state_dict(state["sampler"])
+        self.base_epochs = state["epoch"]
+        logger.info(f" - Resumed from epoch {self.base_epochs}")
+
+    def save_checkpoint(self, checkpoints, epoch):
+        checkpoints.save(
+            epoch,
+            netG=self.netG.state_dict(),
+            netD=self.netD.state_dict(),
+            optimizerG=self.optimizerG.state_dict(),
+            optimizerD=self.optimizerD.state_dict(),
+            dataset={
+                "min": np.asarray(self.dataset.min).tolist(),
+                "max": np.asarray(self.dataset.max).tolist(),
+                "seq_len": self.seq_len,
+                "n_feature": self.in_dim,
+                "hidden_dim": self.dataset.hidden_dim,
+                "normalizer": self.dataset.normalizer.state_dict(),
+            },
+            sampler=self.dataloader.state_dict(),
+        )
         
         
-    def train(self):
+    def train(self, callback=None):
+        """
+        Train G and D from `base_epochs` to `iter_epochs`
+
+        `callback(epoch, summary)` is called after every epoch with the
+        running loss summary; returning False stops training early.
+        """
         logger.info("Train the model")
 
         device = self.device
+        prof = self.profiler
 
         runtime = 0
-        samples = None
-        data_samples = None
-        dashboard = Dashboard(self.dataset)
+        saved_epoch = None
+        self.epoch = self.base_epochs
+        save = self.save["opt"] is True and self.is_main
+        if save is True:
+            checkpoints = CheckpointManager(
+                self.save.get("path", "pretrained"), keep=self.save.get("keep", 3)
+            )
+
+        if self.visual is True:
+            dashboard = LiveDashboard(self.dataset, fps=self.print_fps)
+            data_samples = SampleLog("x.bin", (self.seq_len, self.in_dim))
+            samples = SampleLog("y.bin", (self.seq_len, self.in_dim))
 
         for epoch in range(self.base_epochs, self.iter_epochs):
+            self.dataloader.set_epoch(epoch)
+
             start_time = time.time()
             for i in range(self.iter_critic):
-                y, x = self.dataset.get_samples(self.netG, shape=self.shape, cond=self.cond)
-                
-                Dx = self.netD(x)
-                DGz = self.netD(y)
-                self.optimizerD.zero_grad()
-                
-                with torch.backends.cudnn.flags(enabled=False):
-                    grad_penalty = self._grad_penalty(x, y)
-                loss_D = DGz.mean() - Dx.mean() + grad_penalty
-                loss_D.backward()
-                self.optimizerD.step()
+                loss_D, grad_penalty = self.critic_step()
+                prof.count("critic.steps")
+                prof.step()
 
-                if i == self.iter_critic - 1:
-                    self.losses["D"].append(loss_D)
-                    self.losses["GP"].append(grad_penalty)
+            self._sync()
+            critic_time = (time.time() - start_time) / self.iter_critic
 
             self.optimizerG.zero_grad()
-            y, x = self.dataset.get_samples(self.netG, shape=self.shape, cond=self.cond)
-            Dy = self.netD(y)
-            
-            errl1 = self.criterion_l1n(y, x)
-            errl2 = self.criterion_l2n(y, x)
+            with prof.phase("generator.sample"):
+                y, x = self.dataset.get_samples(
+                    self.runG, shape=self.shape, cond=self.cond, x=self.real_batch()
+                )
+            with prof.phase("generator.forward"):
+                Dy = self.runD(y)
+
+                errl1 = self.criterion_l1n(y, x)
+                errl2 = self.criterion_l2n(y, x)
 
-            loss_G = -Dy.mean()
-            loss_G.backward()
+                loss_G = -Dy.mean()
+            with prof.phase("generator.backward"):
+                loss_G.backward()
 
-            self.optimizerG.step()
-            self.losses["G"].append(loss_G)
-            self.losses["l1"] = errl1
-            self.losses["l2"] = errl2
+            with prof.phase("generator.step"):
+                average_gradients(self.netG)
+                self.optimizerG.step()
+            prof.count("generator.steps")
+            self.losses.update(D=loss_D, GP=grad_penalty, G=loss_G, l1=errl1, l2=errl2)
             
             if self.print_verbose > 0:
+                losses = self.losses.last()
                 print(
                     f"[{(epoch + 1):4d}/{self.iter_epochs:4d}]"
-                    f" D  {self.losses['D'][-1]:2.4f}"
-                    f" G  {self.losses['G'][-1]:2.4f}",
-                    f" L1 {self.losses['l1']:2.4f} ",
-                    f" L2 {self.losses['l2']:2.4f} ",
-                    f" GP  {self.losses['GP'][-1]:.4f}",
+                    f" D  {losses['D']:2.4f}"
+                    f" G  {losses['G']:2.4f}",
+                    f" L1 {losses['l1']:2.4f} ",
+                    f" L2 {losses['l2']:2.4f} ",
+                    f" GP  {losses['GP']:.4f}",
+                    f" Critic {critic_time * 1000:.1f}ms/step",
                     end="\r",
                 )
                 if (epoch + 1) % self.print_newline == 0:
                     print()
 
-            running_loss = {"D": 0, "G": 0, "Dx": 0, "l1": 0, "l2": 0, "GP": 0}
-            for i, data in enumerate(self.dataloader, 0):
+            self.running_loss.reset()
+            batches = iter(self.dataloader)
+            for i in range(len(self.dataloader)):
+                with prof.phase("dataloader"):
+                    x = next(batches)
+                prof.count("batches")
+                prof.count("windows", x.size(0))
+
                 self.optimizerD.zero_grad()
                 self.optimizerG.zero_grad()
-
-                x = data.to(self.device)
                 shape = (x.size(0), x.size(1), self.in_dim)
-                
-                Dx = self.netD(x)
-                errD_real = self.criterion_adv(Dx, target_is_real=True)
-                errD_real.backward()
 
-                # Train with Fake Data z
-                y = self.netG(torch.randn(shape).to(device))
-                DGz1 = self.netD(y)
+                with prof.phase("batch.D"):
+                    Dx = self.runD(x)
+                    errD_real = self.criterion_adv(Dx, target_is_real=True)
+                    errD_real.backward()
 
-                errD_fake = self.criterion_adv(DGz1, target_is_real=False)
-                errD_fake.backward()
-                errD = errD_real + errD_fake
-                self.optimizerD.step() 
+                    # Train with Fake Data z
+                    y = self.runG(torch.randn(shape).to(device))
+                    DGz1 = self.runD(y)
 
-                y = self.netG(torch.randn(shape).to(device))
-                Dy = self.netD(y)
+                    errD_fake = self.criterion_adv(DGz1, target_is_real=False)
+                    errD_fake.backward()
+                    errD = errD_real + errD_fake
+                    average_gradients(self.netD)
+                    self.optimizerD.step()
 
-                errG_ = self.criterion_adv(Dy, target_is_real=False)
+                with prof.phase("batch.G"):
+                    y = self.runG(torch.randn(shape).to(device))
+                    Dy = self.runD(y)
 
-                gradients = y - x
-                gradients_sqr = torch.square(gradients)
-                gradients_sqr_sum = torch.sum(gradients_sqr)
-                gradients_l2_norm = torch.sqrt(gradients_sqr_sum)
-                gradients_penalty = torch.square(1 - gradients_l2_norm)
-                gradients_penalty = gradients_penalty / shape[0]
+                    errG_ = self.criterion_adv(Dy, target_is_real=False)
 
-                errl1 = self.criterion_l1n(y, x) * 10.0
-                errl2 = self.criterion_l2n(y, x) * 10.0
-                errG = errG_ + errl1 + errl2 + gradients_penalty
-                errG.backward()
+                    gradients = y - x
+                    gradients_sqr = torch.square(gradients)
+                    gradients_sqr_sum = torch.sum(gradients_sqr)
+                    gradients_l2_norm = torch.sqrt(gradients_sqr_sum)
+                    gradients_penalty = torch.square(1 - gradients_l2_norm)
+                    gradients_penalty = gradients_penalty / shape[0]
 
-                self.optimizerG.step()
-                running_loss["D"] += errD
-                running_loss["G"] += errG_
-                running_loss["l1"] += errl1
-                running_loss["l2"] += errl2
-                running_loss["GP"] += gradients_penalty
+                    errl1 = self.criterion_l1n(y, x) * 10.0
+                    errl2 = self.criterion_l2n(y, x) * 10.0
+                    errG = errG_ + errl1 + errl2 + gradients_penalty
+                    errG.backward()
+
+                    average_gradients(self.netG)
+                    self.optimizerG.step()
+
+                self.running_loss.update(
+                    D=errD, G=errG_, l1=errl1, l2=errl2, GP=gradients_penalty
+                )
+                prof.step()
                 
-                print(
-                    f"[{i + 1:4d}/{len(self.dataloader):4d}] ", end='\r')
+                if self.is_main:
+                    print(f"[{i + 1:4d}/{len(self.dataloader):4d}] ", end='\r')
 
                 if self.print_verbose > 0 and (i + 1) == len(self.dataloader):
                     runtime += (time.time() - start_time) 
+                    running_loss = self.running_loss.mean()
                     print(
                         f"[{i + 1:4d}/{len(self.dataloader):4d}] "
-                        f"D  {running_loss['D']/(i + 1):.4f} ",
-                        f"G  {running_loss['G']/(i + 1):.4f} ",
-                        f"L1  {running_loss['l1']/(i + 1):.3f} ",
-                        f"L2  {running_loss['l2']/(i + 1):.3f} ",
-                        f"GP  {running_loss['GP']/(i + 1):.3f} ",
+                        f"D  {running_loss['D']:.4f} ",
+                        f"G  {running_loss['G']:.4f} ",
+                        f"L1  {running_loss['l1']:.3f} ",
+                        f"L2  {running_loss['l2']:.3f} ",
+                        f"GP  {running_loss['GP']:.3f} ",
                         f" || {self._runtime(epoch + 1, runtime)}",
                         end="\r"
                     )
 
                 if self.visual is True:
-                    y1 = self.netG(torch.randn(shape).to(device))
-                    y_ = pd.DataFrame(y1[0].T.cpu().detach().numpy())
-                    x_ = pd.DataFrame(x[0].T.cpu().detach().numpy())
-                    if samples is None:
-                        samples = y_
-                        data_samples = x_
-                    else:
-                        data_samples = data_samples.append(self.dataset.denormalize(x_))
-                        samples = samples.append(self.dataset.denormalize(y_))
-                        data_samples.to_csv("x.csv")
-                        samples.to_csv("y.csv")
-                        
-                    dashboard._visualize(
-                        self.dataset.time[i],
-                        self.dataset.denormalize(x.cpu()),
-                        self.dataset.denormalize(y1.cpu()),
-                    )
+                    with prof.phase("visualize"), torch.no_grad():
+                        y1 = self.runG(torch.randn(shape).to(device))
+                        x_ = self.dataset.denormalize(x.cpu())
+                        y_ = self.dataset.denormalize(y1.cpu())
+                        data_samples.write(x_[0])
+                        samples.write(y_[0])
+                        dashboard.submit(self.dataset.time[i], x_, y_)
             
-            if (epoch + 1) % (self.print_newline // 10) == 0:
+            if self.is_main and (epoch + 1) % (self.print_newline // 10) == 0:
                 print()
 
-            if self.save["opt"] is True and (epoch + 1) % self.save["interval"] == 0:
+            summary = self.running_loss.summary()
+            if self.world_size > 1:
+                means = all_reduce_mean({name: stat["mean"] for name, stat in summary.items()})
+                for name, mean in means.items():
+                    summary[name]["mean"] = mean
+            self.history.append(summary)
+            self.epoch = epoch + 1
+
+            if save is True and (epoch + 1) % self.save["interval"] == 0:
                 logger.info(f"Model saved Epochs {epoch+1}")
-                torch.save(self.netG, f"pretrained/netG_e{epoch + 1}.pth")
-                torch.save(self.netD, f"pretrained/netD_e{epoch + 1}.pth")
-                torch.save(self.netG, "pretrained/netG_latest.pth")
-                torch.save(self.netD, "pretrained/netD_latest.pth")
-
-        if self.save["opt"] is True:
-            logger.info(f"Model saved Epochs {epoch+1}")
-            torch.save(self.netG, "pretrained/netG_latest.pth")
-            torch.save(self.netD, "pretrained/netD_latest.pth")
+                with prof.phase("checkpoint"):
+                    self.save_checkpoint(checkpoints, epoch + 1)
+                saved_epoch = epoch + 1
+
+            if callback is not None and callback(epoch + 1, summary) is False:
+                logger.info(f"Stopped at epoch {epoch + 1}")
+                break
+
+        if save is True:
+            if saved_epoch != self.epoch:
+                logger.info(f"Model saved Epochs {self.epoch}")
+                with prof.phase("checkpoint"):
+                    self.save_checkpoint(checkpoints, self.epoch)
+            with prof.phase("checkpoint.flush"):
+                checkpoints.close()
+
+        if self.batches is not None:
+            self.batches.close()
+            self.batches = None
+
+        if self.visual is True:
+            data_samples.close()
+            samples.close()
+            dashboard.close()
+            if dashboard.dropped > 0:
+                logger.info(f"Dashboard dropped {dashboard.dropped} frames")
+
+        if prof.enabled and self.is_main:
+            prof.report()
+            logger.info(f"Profile written : {prof.export()}")
         
+    def critic_step(self):
+        """One WGAN-GP update of D
+
+        Fakes are generated under no_grad since D's update never needs G's
+        graph, and real and fake windows go through D in a single forward.
+        """
+        prof = self.profiler
+        with prof.phase("critic.sample"):
+            y, x = self.dataset.get_samples(
+                self.runG,
+                shape=self.shape,
+                cond=self.cond,
+                noise=self.noise,
+                grad=False,
+                x=self.real_batch(),
+            )
+        with prof.phase("critic.forward"):
+            Dx, DGz = self.runD(torch.cat((x, y))).split(x.size(0))
+
+        self.optimizerD.zero_grad(set_to_none=True)
+        with prof.phase("critic.gp"), torch.backends.cudnn.flags(enabled=False):
+            grad_penalty = self._grad_penalty(x, y)
+        loss_D = DGz.mean() - Dx.mean() + grad_penalty
+        # includes the double backward through the gradient penalty
+        with prof.phase("critic.backward"):
+            loss_D.backward()
+        with prof.phase("critic.step"):
+            average_gradients(self.netD)
+            self.optimizerD.step()
+
+        return loss_D, grad_penalty
+
     def _grad_penalty(self, x, y):
-        batch_size = x.size()[0]
+        batch_size = x.size(0)
 
-        alpha = torch.rand((batch_size, 1, 1), requires_grad=True)
-        alpha = alpha.expand_as(x).to(self.device)
+        if batch_size != self.alpha.size(0):
+            self.alpha = torch.empty((batch_size, 1, 1), device=self.device)
+        alpha = self.alpha.uniform_()
 
         # mixed sample from real and fake; make approx of the 'true' gradient norm
-        interpolates = alpha * x.data + (1 - alpha) * y.data
-        interpolates = interpolates.to(self.device)
+        # D is called eager and in float32 here : double backward needs both
+        interpolates = torch.lerp(y.detach().float(), x.detach().float(), alpha)
+        interpolates.requires_grad_(True)
 
         D_interpolates = self.netD(interpolates)
-        fake = torch.ones(D_interpolates.size()).to(self.device)
+        if self.gp_ones is None or self.gp_ones.shape != D_interpolates.shape:
+            self.gp_ones = torch.ones_like(D_interpolates)
 
         gradients = torch_grad(
             outputs=D_interpolates,
             inputs=interpolates,
-            grad_outputs=fake,
+            grad_outputs=self.gp_ones,
             create_graph=True,
             retain_graph=True,
             only_inputs=True,
         )[0]
-        gradients = gradients.view(gradients.size(0), -1)
+        gradients = gradients.reshape(gradients.size(0), -1)
         gradient_penalty = self.gp_weight * ((gradients.norm(2, dim=1) - 1) ** 2).mean()
         return gradient_penalty
 
+    def _sync(self):
+        if self.device.type == "cuda":
+            torch.cuda.synchronize(self.device)
+
     def _runtime(self, epoch, time):
         mean_time = time / (epoch - self.base_epochs)
         left_epoch = self.iter_epochs - epoch
@@ -329,9 +519,53 @@ class BandGAN:
     def interpolate(self):
         pass
     
-    def evaluate(self):
-        pass
-        
+    @torch.no_grad()
+    def evaluate(self, batch_size=1024, sigma=3):
+        """
+        Band and anomaly flag of every window of the dataset, in time order
+
+        The first `cond` real steps of each window condition the generator
+        like in training, and `compute_bands` gives the band of its
+        denormalized output on the first feature. The last step of a window
+        is flagged when it falls outside median +- `sigma` std.
+
+        Returns a dict of (window,) arrays : "time" and "value" of the last
+        step, the bands, "anomaly" and the ground truth "label" when the
+        dataset has anomaly labels.
+        """
+        dataset = self.dataset
+        n_windows = len(dataset)
+        ends = np.arange(n_windows) * dataset.stride + self.seq_len - 1
+
+        result = {
+            "time": np.asarray(dataset.time)[ends],
+            "value": np.empty(n_windows),
+            **{name: np.empty(n_windows) for name in BANDS},
+        }
+        for start in range(0, n_windows, batch_size):
+            x = dataset.data[start : start + batch_size].to(self.device)
+            shape = (x.size(0), self.seq_len, self.in_dim)
+            y, x = dataset.get_samples(self.netG, shape=shape, cond=self.cond, grad=False, x=x)
+
+            y = dataset.denormalize(y.float().cpu())[..., 0]
+            x = dataset.denormalize(x.cpu())[..., 0]
+
+            rows = slice(start, start + len(x))
+            result["value"][rows] = x[:, -1].numpy()
+            for name, band in compute_bands(y, self.cond).items():
+                result[name][rows] = band
+
+        result["anomaly"] = (result["value"] < result[f"down{sigma}"]) | (result["value"] > result[f"up{sigma}"])
+
+        message = f"Evaluate : windows : {n_windows} : anomalies : {int(result['anomaly'].sum())}"
+        if dataset.label is not None:
+            result["label"] = dataset.label[:, -1, 0].numpy() > 0
+            hits = int((result["anomaly"] & result["label"]).sum())
+            message += f" : labeled : {int(result['label'].sum())} : hits : {hits}"
+        logger.info(message)
+
+        return result
+
 
 if __name__ == "__main__":
     # Argument options
@@ -6,9 +6,122 @@ import torch
 import numpy as np
 import pandas as pd
 from timeseries.logger import Logger
+from timeseries.distributed import barrier, get_rank
+from timeseries.utils.cache import DatasetCache, cache_key
+from timeseries.utils.normalizer import Normalizer
+from timeseries.utils.reader import infer_format, read_table
 
 logger = Logger(__file__)
 
+
+def merge_spans(spans):
+    """Sort anomaly spans by start time and merge the overlapping ones"""
+    if len(spans) == 0:
+        return np.empty(0, dtype="datetime64[ns]"), np.empty(0, dtype="datetime64[ns]")
+
+    starts = pd.to_datetime([span[0] for span in spans]).values.astype("datetime64[ns]")
+    ends = pd.to_datetime([span[1] for span in spans]).values.astype("datetime64[ns]")
+    order = np.argsort(starts, kind="mergesort")
+    starts, ends = starts[order], ends[order]
+
+    # Fast path : already disjoint spans need no merging
+    running_end = np.maximum.accumulate(ends)
+    if np.all(starts[1:] > running_end[:-1]):
+        return starts, ends
+
+    # A new group begins where the start is past every previous end
+    new_group = np.ones(len(starts), dtype=bool)
+    new_group[1:] = starts[1:] > running_end[:-1]
+
+    merged_ends = np.maximum.reduceat(ends, np.flatnonzero(new_group))
+    return starts[new_group], merged_ends
+
+
+def label_spans(times, spans):
+    """Return 0/1 labels for `times` that fall in any closed [start, end] span"""
+    times = np.asarray(times).astype("datetime64[ns]")
+    starts, ends = merge_spans(spans)
+
+    order = None
+    if len(times) > 1 and not np.all(times[1:] >= times[:-1]):
+        order = np.argsort(times, kind="mergesort")
+        times = times[order]
+
+    # Each merged span covers the sorted slice [lo, hi)
+    lo = np.searchsorted(times, starts, side="left")
+    hi = np.searchsorted(times, ends, side="right")
+
+    marks = np.zeros(len(times) + 1, dtype=np.int64)
+    np.add.at(marks, lo, 1)
+    np.add.at(marks, hi, -1)
+    label = (np.cumsum(marks[:-1]) > 0).astype(np.float64)
+
+    if order is not None:
+        unsorted = np.empty_like(label)
+        unsorted[order] = label
+        label = unsorted
+
+    return label
+
+
+def find_timegaps(times, timegap):
+    """Locate gaps in ordered `times`
+
+    Returns the positions of the rows that follow a gap, the first and last
+    missing timestamp of each gap and the number of timestamps to insert.
+    """
+    times = np.asarray(times).astype("datetime64[ns]")
+    timegap = pd.Timedelta(timegap).to_timedelta64()
+
+    gap_idx = np.flatnonzero(np.diff(times) != timegap) + 1
+    starts = times[gap_idx - 1] + timegap
+    ends = times[gap_idx] - timegap
+    counts = np.maximum(0, (ends - starts) // timegap + 1)
+
+    return gap_idx, starts, ends, counts
+
+
+def expand_timegaps(starts, counts, timegap):
+    """Flat array of the missing timestamps, `counts[i]` of them from `starts[i]`"""
+    timegap = pd.Timedelta(timegap).to_timedelta64()
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + offsets * timegap
+
+
+def interleave_timegaps(times, values, prev, timegap):
+    """Rows `values` at ordered `times`, with the gaps since `prev` filled
+
+    `prev` is the timestamp preceding `times`, or None at the start of the
+    series. Returns the block timestamps, the block values (NaN on filled
+    rows) and the first and last missing timestamp of each gap.
+    """
+    offset = 0 if prev is None else 1
+    carried = times if prev is None else np.concatenate(([prev], times))
+    gap_idx, gap_starts, gap_ends, counts = find_timegaps(carried, timegap)
+
+    # Every row moves down by the number of timestamps filled before it
+    shift = np.zeros(len(carried), dtype=np.int64)
+    shift[gap_idx] = counts
+    rows = (np.arange(len(carried)) + np.cumsum(shift))[offset:] - offset
+
+    block = len(times) + counts.sum()
+    is_filled = np.ones(block, dtype=bool)
+    is_filled[rows] = False
+
+    block_times = np.empty(block, dtype="datetime64[ns]")
+    block_times[rows] = times
+    block_times[is_filled] = expand_timegaps(gap_starts, counts, timegap)
+
+    block_values = np.full((block, values.shape[1]), np.nan, dtype=np.float32)
+    block_values[rows] = values
+
+    return block_times, block_values, gap_starts, gap_ends
+
+
+def np_allocate(name, shape, dtype):
+    return np.empty(shape, dtype=dtype)
+
+
 class TimeseriesDataset:
     def __init__(self, config, device):
         # Load Data
@@ -17,20 +130,32 @@ class TimeseriesDataset:
         self.init_config(config)
 
         # Dataset
-        data, label = self.load_data()
+        series = self.load_series()
+
+        self.n_feature = series["values"].shape[1]
+        self.normalizer = Normalizer.from_state_dict(series["normalizer"])
+        self.min, self.max = self.normalizer.min, self.normalizer.max
+        self.timegap = pd.Timedelta(series["timegap"])
+        self.end = self.parse_end(series)
+
+        # Series buffers the windows are views of; `append` grows them
+        self.storage = {
+            "time": series["time"],
+            "values": torch.from_numpy(series["values"]),
+        }
+        if "label" in series:
+            self.storage["label"] = torch.from_numpy(series["label"])
+        self.length = len(series["time"])
+        self.owned = False
+        self.refresh()
 
-        self.n_feature = len(data.columns)
-        self.time = self.store_times(data)
-        self.data = self.store_values(data, normalize=True)
-        self.label = self.store_values(label, normalize=False)
-        
-        self.data_len = len(self.data)
-        
     def init_config(self, config):
         self.title = config["data"]
         self.label = config["anomaly"]
         self.workers = config["workers"]
+        self.prefetch = config.get("prefetch", 2)
         self.index = config["index"]
+        self.features = list(config.get("features", ["value"]))
 
         self.stride = config["stride"]
         self.seq_len = config["seq_len"]
@@ -40,74 +165,368 @@ class TimeseriesDataset:
         
         self.data_path = os.path.join(config["path"], config["data"])
         self.anomaly_path = os.path.join(config["path"], config["anomaly"])
-        
-        
+        self.cache_path = config.get("cache", None)
+        self.chunksize = config.get("chunksize", None)
+        self.time_format = config.get("time_format", None)
+        self.format = config.get("format", None) or infer_format(self.data_path)
+        self.time_range = config.get("time_range", None)
+        self.moments = config.get("moments", False)
+
+    def load_series(self):
+        """Load the preprocessed series, from the on-disk cache when possible"""
+        cache = None
+        if self.cache_path is not None:
+            cache = DatasetCache(self.cache_path, self.cache_key())
+            if cache.exists():
+                logger.info(f"Loading cached dataset : {cache.path}")
+                return cache.load()
+
+        # Columnar files are already typed and projected, chunking is CSV only
+        if self.chunksize is not None and self.format == "csv":
+            allocate = cache.allocate if cache is not None else np_allocate
+            series = self.load_chunked(allocate)
+        else:
+            data, label = self.load_data()
+            series = {
+                "time": self.store_times(data),
+                "values": self.store_values(data, normalize=True),
+            }
+            if label is not None:
+                series["label"] = self.store_values(label, columns=["label"])
+
+        series["min"] = self.min.tolist()
+        series["max"] = self.max.tolist()
+        series["normalizer"] = self.normalizer.state_dict()
+        series["timegap"] = str(self.timegap)
+        series["end"] = str(pd.Timestamp(self.end))
+
+        if cache is not None:
+            cache.save(series)
+            logger.info(f"Saved dataset cache : {cache.path}")
+
+        return series
+
+    def cache_key(self):
+        anomalies = self.read_anomalies(verbose=False)
+
+        # Windows are views built after loading, so `seq_len` and `stride`
+        # do not change the cached series and are left out of the key
+        options = {
+            "index": self.index,
+            "features": self.features,
+            "time_format": self.time_format,
+            "format": self.format,
+            "time_range": self.time_range,
+            "anomaly": self.anomaly_path,
+            "anomalies": anomalies,
+            "moments": self.moments,
+        }
+        return cache_key(self.data_path, options)
+
     def load_data(self):
-        data = pd.read_csv(self.data_path)
-        data, label = self.fill_timegap(data)
+        data = read_table(
+            self.data_path,
+            columns=[self.index, *self.features],
+            index=self.index,
+            time_range=self.time_range,
+            format=self.format,
+        )
+        data, missing = self.fill_timegap(data)
 
         label = self.load_anomaly(data)
         data = data.set_index(self.index)
+        self.end = data.index[-1]
 
         return data, label
     
+    def load_chunked(self, allocate):
+        """Stream the CSV `chunksize` rows at a time into preallocated arrays
+
+        Rows are expected in time order. A first pass over the index column
+        sizes the output and finds the gaps, a second one parses the values
+        as float32 and writes them, with the gaps filled, straight into the
+        arrays returned by `allocate`. Peak memory beyond the output arrays
+        is bounded by the chunk size.
+        """
+        head = pd.read_csv(self.data_path, usecols=[self.index], nrows=2)
+        times = self.parse_times(head[self.index])
+        timegap = pd.Timedelta(times[1] - times[0])
+
+        # Pass 1 : output length and gap spans, carrying the last timestamp
+        length, prev = 0, None
+        starts, ends = list(), list()
+        for times, _ in self.read_chunks([self.index]):
+            carried = times if prev is None else np.concatenate(([prev], times))
+            _, gap_starts, gap_ends, counts = find_timegaps(carried, timegap)
+
+            length += len(times) + counts.sum()
+            starts.append(gap_starts)
+            ends.append(gap_ends)
+            prev = times[-1]
+
+        missing = self.store_missing(np.concatenate(starts), np.concatenate(ends))
+        anomalies = self.read_anomalies()
+
+        series = {
+            "time": allocate("time", (length,), "U11"),
+            "values": allocate("values", (length, len(self.features)), np.float32),
+        }
+        if anomalies is not None:
+            series["label"] = allocate("label", (length, 1), np.float32)
+
+        # Pass 2 : interleave rows and filled timestamps chunk by chunk
+        pos, prev = 0, None
+        self.normalizer = Normalizer(len(self.features), moments=self.moments)
+        for times, chunk in self.read_chunks([self.index, *self.features]):
+            values = chunk[self.features].to_numpy(dtype=np.float32)
+            block_times, block_values, _, _ = interleave_timegaps(times, values, prev, timegap)
+            block = len(block_times)
+
+            series["time"][pos : pos + block] = self.format_times(block_times)
+            series["values"][pos : pos + block] = block_values
+            if anomalies is not None:
+                series["label"][pos : pos + block, 0] = label_spans(block_times, anomalies)
+
+            self.normalizer.update(values)
+
+            pos += block
+            prev = times[-1]
+
+        # Pass 3 : normalize in place, one chunk of the output at a time
+        self.min, self.max = self.normalizer.min, self.normalizer.max
+        for start in range(0, length, self.chunksize):
+            block = series["values"][start : start + self.chunksize]
+            self.normalizer.transform(block, out=block)
+
+        logger.info(
+            f"Chunked loading : records : {length} : filled spans : {len(missing)}"
+            f" : timegap : {timegap}"
+        )
+
+        self.timegap = timegap
+        self.end = prev
+        return series
+
+    def parse_end(self, series):
+        """Last timestamp of the series, from the formatted times on older caches"""
+        if "end" in series:
+            return np.datetime64(pd.Timestamp(series["end"]), "ns")
+        return pd.to_datetime(series["time"][-1], format="%y%m%d:%H%M").to_datetime64()
+
+    def read_chunks(self, columns):
+        """Yield the parsed timestamps and rows of each chunk inside `time_range`"""
+        reader = pd.read_csv(
+            self.data_path,
+            usecols=columns,
+            chunksize=self.chunksize,
+            dtype={feature: np.float32 for feature in self.features},
+        )
+        for chunk in reader:
+            times = self.parse_times(chunk[self.index])
+            if self.time_range is not None:
+                start, end = pd.to_datetime(self.time_range).values.astype("datetime64[ns]")
+                keep = (times >= start) & (times <= end)
+                times, chunk = times[keep], chunk[keep]
+
+            if len(times) > 0:
+                yield times, chunk
+
+    def parse_times(self, times):
+        times = pd.to_datetime(times, format=self.time_format)
+        return times.values.astype("datetime64[ns]")
+
+    def format_times(self, times):
+        return np.asarray(pd.DatetimeIndex(times).strftime("%y%m%d:%H%M"), dtype="U11")
+
     def fill_timegap(self, data):
-        # TODO : Need Refactoring 
-        data[self.index] = pd.to_datetime(data[self.index])
-        timegap = data[self.index][1] - data[self.index][0]
-        label = pd.DataFrame()
+        data[self.index] = pd.to_datetime(data[self.index], format=self.time_format)
+        times = data[self.index]
+        timegap = times[1] - times[0]
 
         length = len(data)
-        with open(self.anomaly_path, mode="r") as f:
-            json_data = json.load(f)
+        # Detect every gap at once instead of walking the rows
+        _, starts, ends, counts = find_timegaps(times.values, timegap)
+        filled = expand_timegaps(starts, counts, timegap)
 
-        json_data["missing"] = list()
-        for i in range(1, len(data)):
-            if data[self.index][i] - data[self.index][i - 1] != timegap:
-                start_time = data[self.index][i - 1] + timegap
-                end_time = data[self.index][i] - timegap
-                json_data["missing"].append([str(start_time), str(end_time)])
-                
-                # Fill time gap
-                for _ in range(1 + (end_time - start_time) // timegap):
-                    time = start_time + _ * timegap
-                    data = data.append({self.index: time}, ignore_index=True)
-                    
-        data = data.set_index(self.index).sort_index().reset_index()
-
-        with open(self.anomaly_path, mode="w") as f:
-            json.dump(json_data, f)
+        data = self.reindex_timegap(data, filled)
+        missing = self.store_missing(starts, ends)
 
         filled_length = len(data) - length
         logger.info(f"Filling Time Gap : Filled records : {filled_length} : timegap : {timegap}")
-                
-        return data, label
 
-    def load_anomaly(self, data):
+        self.timegap = timegap
+        return data, missing
+
+    def store_missing(self, starts, ends, extend=False):
+        """Record the filled spans as `missing` in the anomaly JSON
+
+        With `extend`, the spans are added to the recorded ones instead of
+        replacing them. In distributed training every rank computes the
+        spans but only rank 0 writes them, through a temporary file
+        replacing the JSON, so the other ranks never read it half written.
+        """
+        with open(self.anomaly_path, mode="r") as f:
+            json_data = json.load(f)
+
+        spans = [
+            [str(pd.Timestamp(start)), str(pd.Timestamp(end))]
+            for start, end in zip(starts, ends)
+        ]
+        json_data["missing"] = (json_data.get("missing", list()) if extend else list()) + spans
+
+        if get_rank() == 0:
+            tmp_path = f"{self.anomaly_path}.tmp"
+            with open(tmp_path, mode="w") as f:
+                json.dump(json_data, f)
+            os.replace(tmp_path, self.anomaly_path)
+        barrier()
+
+        return json_data["missing"]
+
+    def reindex_timegap(self, data, filled):
+        """Insert the `filled` timestamps as empty rows, keeping time order"""
+        if data[self.index].is_unique:
+            data = data.set_index(self.index)
+            full_index = data.index.append(pd.DatetimeIndex(filled)).sort_values()
+            return data.reindex(full_index).rename_axis(self.index).reset_index()
+
+        # Duplicated timestamps cannot be reindexed; fall back to one concat
+        filled = pd.DataFrame({self.index: filled})
+        data = pd.concat([data, filled], ignore_index=True)
+        return data.sort_values(self.index, kind="mergesort", ignore_index=True)
+
+    def read_anomalies(self, verbose=True):
         if self.label is None:
-            logger.info("Anomaly labels were not provided")
+            if verbose:
+                logger.info("Anomaly labels were not provided")
             return None
 
         if not os.path.exists(self.anomaly_path):
-            logger.info(f"Anomaly file path is not corrected : {self.anomaly_path}")
+            if verbose:
+                logger.info(f"Anomaly file path is not corrected : {self.anomaly_path}")
             return None
 
         with open(self.anomaly_path) as f:
-            anomalies = json.load(f)["anomalies"]
-        
-        label = np.zeros(len(data))
-        for ano_span in anomalies:
-            ano_start = pd.to_datetime(ano_span[0])
-            ano_end = pd.to_datetime(ano_span[1])
-            for idx in data.index:
-                if data.loc[idx, self.index] >= ano_start and data.loc[idx, self.index] <= ano_end:
-                    label[idx] = 1.0
+            return json.load(f)["anomalies"]
+
+    def load_anomaly(self, data):
+        anomalies = self.read_anomalies()
+        if anomalies is None:
+            return None
+
+        label = label_spans(data[self.index].values, anomalies)
         
-        label = pd.DataFrame({self.index : data[self.index], "value": label})
+        label = pd.DataFrame({self.index : data[self.index], "label": label})
         label = label.set_index(self.index)
         
         return label
 
+    def refresh(self):
+        """Rebuild the series and window views over the first `length` rows"""
+        self.time = self.storage["time"][: self.length]
+        self.data = self.windowing(self.storage["values"][: self.length])
+        self.label = None
+        if "label" in self.storage:
+            self.label = self.windowing(self.storage["label"][: self.length])
+
+        self.data_len = len(self.data)
+
+    def reserve(self, length):
+        """Make the buffers hold `length` rows, doubling their capacity
+
+        The buffers loaded from the cache are memory-mapped, so they are
+        copied on the first append even if they are large enough.
+        """
+        capacity = len(self.storage["time"])
+        if self.owned and length <= capacity:
+            return
+
+        capacity = max(length, 2 * capacity)
+        for name, buffer in self.storage.items():
+            shape = (capacity,) + tuple(buffer.shape[1:])
+            if isinstance(buffer, torch.Tensor):
+                grown = torch.empty(shape, dtype=buffer.dtype)
+            else:
+                grown = np.empty(shape, dtype=buffer.dtype)
+            grown[: self.length] = buffer[: self.length]
+            self.storage[name] = grown
+
+        self.owned = True
+
+    def parse_rows(self, rows):
+        """Time ordered timestamps and float32 values of a frame of new rows"""
+        times = rows[self.index] if self.index in rows.columns else rows.index
+        times = self.parse_times(times)
+        values = rows[self.features].to_numpy(dtype=np.float32)
+
+        order = np.argsort(times, kind="mergesort")
+        return times[order], values[order]
+
+    def append(self, rows, refit=False):
+        """Append new observations and return the windows they complete
+
+        `rows` is a frame with the index column (or a datetime index) and the
+        feature columns. Rows not after the last timestamp are dropped, and the
+        gap since the last timestamp is filled like at loading and recorded
+        in the anomaly JSON. Labels are extended from the anomaly spans
+        currently in the anomaly file.
+
+        The new rows are normalized with the current statistics, which stay
+        frozen unless `refit` : then they are updated with the new rows and
+        the history is rescaled in place if the range grew.
+
+        The buffers grow by doubling and the windows stay views of them, so
+        an append costs O(new rows) amortized, plus the rescale on refit.
+        """
+        times, values = self.parse_rows(rows)
+
+        keep = times > self.end
+        if not keep.all():
+            logger.warn(f"Append : dropped {int((~keep).sum())} rows not after {pd.Timestamp(self.end)}")
+            times, values = times[keep], values[keep]
+
+        if len(times) == 0:
+            return self.data[self.data_len :]
+
+        block_times, block_values, gap_starts, gap_ends = interleave_timegaps(
+            times, values, self.end, self.timegap
+        )
+        if len(gap_starts) > 0:
+            self.store_missing(gap_starts, gap_ends, extend=True)
+
+        start, end = self.length, self.length + len(block_times)
+        self.reserve(end)
+
+        if refit:
+            previous = self.normalizer.copy()
+            self.normalizer.update(values)
+            if not (
+                np.array_equal(previous.min, self.normalizer.min)
+                and np.array_equal(previous.max, self.normalizer.max)
+            ):
+                self.normalizer.renormalize(self.storage["values"][:start], previous)
+                self.min, self.max = self.normalizer.min, self.normalizer.max
+
+        self.normalizer.transform(block_values, out=block_values)
+        self.storage["time"][start:end] = self.format_times(block_times)
+        self.storage["values"][start:end] = torch.from_numpy(block_values)
+        if "label" in self.storage:
+            anomalies = self.read_anomalies(verbose=False)
+            label = np.zeros(len(block_times))
+            if anomalies is not None:
+                label = label_spans(block_times, anomalies)
+            self.storage["label"][start:end, 0] = torch.from_numpy(label)
+
+        n_windows = self.data_len
+        self.length, self.end = end, block_times[-1]
+        self.refresh()
+
+        logger.info(
+            f"Append : records : {len(times)} : filled records : {len(block_times) - len(times)}"
+            f" : windows : {self.data_len - n_windows}"
+        )
+        return self.data[n_windows:]
+
     def __len__(self):
         return self.data_len
 
@@ -115,44 +534,67 @@ class TimeseriesDataset:
         return self.data[idx]
 
     def store_times(self, data):
-        time = pd.to_datetime(data.index)
-        time = time.strftime("%y%m%d:%H%M")
-        time = time.values
-        return time
+        return self.format_times(data.index)
 
-    def store_values(self, data, normalize=False):
-        data = self.windowing(data[["value"]])
+    def store_values(self, data, columns=None, normalize=False):
+        """`columns` (the features by default) as one contiguous float32 (time, feature) array
+
+        The frame is converted once and normalized in place, without a copy
+        per column or per step.
+        """
+        columns = self.features if columns is None else columns
+        values = np.ascontiguousarray(data[columns].to_numpy(dtype=np.float32))
         if normalize is True:
-            data = self.normalize(data)
-        data = torch.from_numpy(data).float()
-        return data
-    
+            self.normalize(values, out=values)
+        return values
+
     def windowing(self, x):
-        stop = len(x) - self.seq_len
-        return np.array([x[i : i + self.seq_len] for i in range(0, stop, self.stride)])
+        """Return (window, seq_len, feature) views over the contiguous series `x`
 
-    def normalize(self, x):
-        """Normalize input in [-1,1] range, saving statics for denormalization"""
-        self.max = x.max()
-        self.min = x.min()
+        Windows share the storage of `x`, so memory stays O(series length)
+        whatever `seq_len` and `stride` are.
+        """
+        n_windows = len(range(0, len(x) - self.seq_len, self.stride))
+        if n_windows == 0:
+            return x.new_empty((0, self.seq_len, x.size(1)))
 
-        return 2 * (x - x.min()) / (x.max() - x.min()) - 1
+        windows = x.unfold(0, self.seq_len, self.stride)[:n_windows]
+        return windows.permute(0, 2, 1)
+
+    def normalize(self, x, out=None):
+        """Normalize input in [-1,1] range per feature, fitting the statistics on the raw series"""
+        self.normalizer = Normalizer(x.shape[1], moments=self.moments).fit(x)
+        self.min, self.max = self.normalizer.min, self.normalizer.max
+
+        return self.normalizer.transform(x, out=out)
 
     def denormalize(self, x):
         """Revert [-1,1] normalization"""
-        if not hasattr(self, "max") or not hasattr(self, "min"):
+        if not hasattr(self, "normalizer"):
             raise Exception(
                 "You are calling denormalize, but the input was not normalized"
             )
-        return 0.5 * (x * self.max - x * self.min + self.max + self.min)
+        return self.normalizer.inverse_transform(x)
+
+    def get_samples(self, netG, shape, cond, noise=None, grad=True, x=None):
+        """Sample real windows `x` and generate `y` from noise conditioned on them
 
-    def get_samples(self, netG, shape, cond):
-        idx = np.random.randint(self.data.shape[0], size=shape[0])
-        x = self.data[idx].to(self.device)
-        z = torch.randn(shape).to(self.device)
+        `noise` is an optional preallocated buffer refilled in place, and
+        `grad=False` runs the generator without recording its graph. A batch
+        of real windows already on the device can be passed as `x`, e.g.
+        from `WindowBatches.stream`.
+        """
+        if x is None:
+            idx = np.random.randint(self.data.shape[0], size=shape[0])
+            x = self.data[idx].to(self.device)
+        if noise is None:
+            z = torch.randn(shape, device=self.device)
+        else:
+            z = noise.normal_()
         if cond > 0:
             z[:, :cond, :] = x[:, :cond, :]
 
-        y = netG(z).to(self.device)
+        with torch.set_grad_enabled(grad):
+            y = netG(z)
 
         return y, x
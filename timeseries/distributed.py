@@ -0,0 +1,157 @@
+import os
+import json
+import socket
+import logging
+import argparse
+import numpy as np
+import torch
+import torch.distributed as dist
+from torch._utils import _flatten_dense_tensors, _unflatten_dense_tensors
+
+
+def is_distributed():
+    return dist.is_available() and dist.is_initialized()
+
+
+def get_rank():
+    return dist.get_rank() if is_distributed() else 0
+
+
+def get_world_size():
+    return dist.get_world_size() if is_distributed() else 1
+
+
+def init_distributed(backend="gloo"):
+    """
+    Join the process group described by the torchrun environment
+
+    Does nothing unless WORLD_SIZE > 1. Every rank gets an equal share of
+    the cores of its node as torch intra-op threads, and only rank 0 keeps
+    INFO logging.
+
+    Returns (rank, world_size).
+    """
+    world_size = int(os.environ.get("WORLD_SIZE", 1))
+    if world_size <= 1:
+        return 0, 1
+
+    if not is_distributed():
+        dist.init_process_group(backend=backend)
+
+    local_size = int(os.environ.get("LOCAL_WORLD_SIZE", world_size))
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // local_size))
+
+    rank = dist.get_rank()
+    if rank != 0:
+        logging.getLogger().setLevel(logging.WARNING)
+    return rank, dist.get_world_size()
+
+
+def barrier():
+    """Wait for every rank, no-op outside distributed training"""
+    if is_distributed():
+        dist.barrier()
+
+
+def broadcast_module(module, src=0):
+    """Copy the parameters and buffers of rank `src` to every rank"""
+    if not is_distributed():
+        return
+    for tensor in module.state_dict().values():
+        dist.broadcast(tensor, src)
+
+
+def broadcast_value(value, src=0):
+    """Integer `value` of rank `src` on every rank"""
+    if not is_distributed():
+        return value
+    tensor = torch.tensor([value], dtype=torch.int64)
+    dist.broadcast(tensor, src)
+    return int(tensor.item())
+
+
+def seed_rank(rank, epoch=0):
+    """
+    Give each rank its own numpy / torch streams
+
+    Rank 0 keeps its current streams, e.g. the ones just restored from a
+    checkpoint. The other ranks are seeded from the initial torch seed of
+    rank 0, their rank and the starting `epoch`, so multi-process runs are
+    reproducible and a resumed run does not replay the first epochs' noise.
+    """
+    base = broadcast_value(torch.initial_seed() % 2 ** 63)
+    if rank == 0:
+        return
+
+    seed = int(np.random.SeedSequence([base, rank, epoch]).generate_state(1)[0])
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+def average_gradients(module):
+    """
+    All-reduce the gradients of `module` as one flat buffer and average them
+
+    Used instead of wrapping D in DistributedDataParallel : the critic runs
+    D twice per step, once through the double backward of the gradient
+    penalty, which DDP's reducer does not support. Averaging after the full
+    backward keeps the penalty term synchronized with the rest of the loss.
+    """
+    if not is_distributed():
+        return
+
+    grads = [p.grad for p in module.parameters() if p.grad is not None]
+    if len(grads) == 0:
+        return
+
+    flat = _flatten_dense_tensors(grads)
+    dist.all_reduce(flat)
+    flat /= dist.get_world_size()
+    for grad, synced in zip(grads, _unflatten_dense_tensors(flat, grads)):
+        grad.copy_(synced)
+
+
+def all_reduce_mean(values):
+    """Mean of a dict of floats over every rank"""
+    if not is_distributed():
+        return values
+
+    names = list(values)
+    tensor = torch.tensor([values[name] for name in names], dtype=torch.float64)
+    dist.all_reduce(tensor)
+    tensor /= dist.get_world_size()
+    return dict(zip(names, tensor.tolist()))
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _worker(rank, world_size, port, config):
+    os.environ.update(
+        RANK=str(rank),
+        LOCAL_RANK=str(rank),
+        WORLD_SIZE=str(world_size),
+        LOCAL_WORLD_SIZE=str(world_size),
+        MASTER_ADDR="127.0.0.1",
+        MASTER_PORT=str(port),
+    )
+    from timeseries.core import BandGAN
+
+    model = BandGAN(config=config)
+    model.train()
+    dist.destroy_process_group()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="** BandGAN multi-process CPU training **")
+    parser.add_argument("-cfg", "--config", type=str, default="config/config.json", help="config.json path")
+    parser.add_argument("-n", "--nproc", type=int, default=2, help="local training processes")
+    opt = parser.parse_args()
+
+    with open(opt.config) as f:
+        config = json.load(f)
+
+    torch.multiprocessing.spawn(_worker, args=(opt.nproc, free_port(), config), nprocs=opt.nproc)
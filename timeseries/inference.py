@@ -0,0 +1,148 @@
+import time
+import argparse
+import numpy as np
+import torch
+
+from timeseries.logger import Logger
+
+logger = Logger(__file__)
+
+
+def window_starts(offsets, lengths, seq_len, stride=1, last=False):
+    """Flat start positions of the windows of every series in a packed buffer
+
+    Returns the starts and, per series, the number of windows it owns.
+    """
+    n_windows = np.maximum(0, (lengths - seq_len) // stride + 1)
+    if last is True:
+        n_windows = np.minimum(n_windows, 1)
+        return (offsets + lengths - seq_len)[n_windows > 0], n_windows
+
+    local = np.arange(n_windows.sum()) - np.repeat(np.cumsum(n_windows) - n_windows, n_windows)
+    return np.repeat(offsets, n_windows) + local * stride, n_windows
+
+
+class MultiSeriesEngine:
+    """
+    Batched generator inference over many independent series
+
+    Every series is normalized with its own min/max, all of them are packed
+    into one contiguous buffer, and windows from any series are gathered into
+    large batches with one index operation. One LSTMGenerator forward runs
+    per batch and the outputs are scattered back per series, denormalized
+    with that series' statistics.
+
+    Args:
+        netG: trained LSTMGenerator
+        seq_len: window length
+        cond: leading real steps fed to the generator in place of noise
+        batch_size: windows per forward
+        device: device the generator runs on
+    """
+
+    def __init__(self, netG, seq_len, cond=0, batch_size=4096, device=None):
+        self.netG = netG.eval()
+        self.seq_len = seq_len
+        self.cond = cond
+        self.batch_size = batch_size
+        self.device = device
+
+    def pack(self, series, stats=None):
+        """Concatenate the normalized series; returns buffer, offsets, lengths, min, max"""
+        values = [np.asarray(x, dtype=np.float32) for x in series]
+        values = [x.reshape(len(x), -1) for x in values]
+        lengths = np.array([len(x) for x in values], dtype=np.int64)
+        offsets = np.cumsum(lengths) - lengths
+
+        buffer = np.concatenate(values)
+        if stats is None:
+            vmin = np.minimum.reduceat(buffer, offsets, axis=0)
+            vmax = np.maximum.reduceat(buffer, offsets, axis=0)
+        else:
+            vmin = np.asarray([s[0] for s in stats], dtype=np.float32).reshape(len(values), -1)
+            vmax = np.asarray([s[1] for s in stats], dtype=np.float32).reshape(len(values), -1)
+
+        scale = np.where(vmax > vmin, vmax - vmin, 1).astype(np.float32)
+        buffer -= np.repeat(vmin, lengths, axis=0)
+        buffer *= np.repeat(2 / scale, lengths, axis=0)
+        buffer -= 1
+
+        return torch.from_numpy(buffer), offsets, lengths, vmin, vmax
+
+    @torch.no_grad()
+    def run(self, series, stats=None, stride=1, last=True):
+        """
+        Generate windows for every series
+
+        Args:
+            series: dict of name -> raw values shaped (time,) or (time, feature)
+            stats: optional dict of name -> (min, max), e.g. training statistics
+            stride: step between windows when `last` is False
+            last: only the most recent window of each series
+
+        Returns a dict of name -> (window, seq_len, feature) generated values.
+        """
+        names = list(series)
+        stats = [stats[name] for name in names] if stats is not None else None
+        buffer, offsets, lengths, vmin, vmax = self.pack([series[n] for n in names], stats)
+
+        starts, n_windows = window_starts(offsets, lengths, self.seq_len, stride, last)
+        owner = np.repeat(np.arange(len(names)), n_windows)
+        steps = torch.arange(self.seq_len)
+
+        row_min = torch.from_numpy(vmin[owner]).unsqueeze(1)
+        row_max = torch.from_numpy(vmax[owner]).unsqueeze(1)
+
+        outputs = torch.empty((len(starts), self.seq_len, buffer.size(1)))
+        starts = torch.from_numpy(starts)
+        for begin in range(0, len(starts), self.batch_size):
+            end = begin + self.batch_size
+            x = buffer[starts[begin:end, None] + steps].to(self.device)
+
+            z = torch.randn(x.shape, device=self.device)
+            if self.cond > 0:
+                z[:, : self.cond, :] = x[:, : self.cond, :]
+
+            y = self.netG(z).cpu()
+            outputs[begin:end] = 0.5 * (
+                y * row_max[begin:end] - y * row_min[begin:end] + row_max[begin:end] + row_min[begin:end]
+            )
+
+        bounds = np.concatenate(([0], np.cumsum(n_windows)))
+        return {
+            name: outputs[bounds[i] : bounds[i + 1]].numpy() for i, name in enumerate(names)
+        }
+
+
+if __name__ == "__main__":
+    from timeseries.layers.LSTMGAN import LSTMGenerator
+    from timeseries.utils.checkpoint import load_generator
+
+    parser = argparse.ArgumentParser(description="** Multi-series inference throughput **")
+    parser.add_argument("-m", "--model", type=str, default=None, help="checkpoint or saved generator, random weights if omitted")
+    parser.add_argument("--series", type=int, default=2000)
+    parser.add_argument("--length", type=int, default=1440)
+    parser.add_argument("--seq-len", type=int, default=60)
+    parser.add_argument("--hidden-dim", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=4096)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    opt = parser.parse_args()
+
+    if opt.threads is not None:
+        torch.set_num_threads(opt.threads)
+
+    device = torch.device("cpu")
+    if opt.model is not None:
+        netG, _ = load_generator(opt.model, device)
+    else:
+        netG = LSTMGenerator(1, out_dim=1, hidden_dim=opt.hidden_dim, device=device)
+
+    rng = np.random.default_rng(31)
+    series = {f"meter_{i}": rng.normal(size=opt.length).cumsum() for i in range(opt.series)}
+
+    engine = MultiSeriesEngine(netG, opt.seq_len, cond=opt.seq_len // 2, batch_size=opt.batch_size, device=device)
+    start_time = time.perf_counter()
+    engine.run(series, last=True)
+    elapsed = time.perf_counter() - start_time
+
+    print(f"{opt.series} series in {elapsed:.3f} sec : {opt.series / elapsed:.1f} series/sec")
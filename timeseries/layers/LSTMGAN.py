@@ -1,6 +1,13 @@
+import warnings
 import torch
 import torch.nn as nn
 
+PRECISIONS = {
+    "float32": None,
+    "bfloat16": torch.bfloat16,
+    "float16": torch.float16,
+}
+
 
 class GAN:
     def __init__(self, netD, netG):
@@ -39,23 +46,30 @@ class LSTMGenerator(nn.Module):
 
         self.linear = nn.Sequential(nn.Linear(h2_dim, out_dim), nn.Tanh())
 
-    def forward(self, input):
-        h0_dim = self.hidden_dim // 4
-        batch_size, seq_len = input.size(0), input.size(1)
+    def forward(self, input, state=None):
+        outputs, _ = self.forward_state(input, state)
+        return outputs
 
-        h_0 = torch.zeros(self.n_layers, batch_size, h0_dim).to(self.device)
-        c_0 = torch.zeros(self.n_layers, batch_size, h0_dim).to(self.device)
+    def forward_state(self, input, state=None):
+        """Forward that also returns the (h, c) states of the three LSTMs
+
+        Passing the returned `state` to the next call continues the sequence
+        instead of starting from zero states, for streaming inference.
+        Without a state the fused LSTMs use their implicit device-side zeros.
+        """
+        batch_size, seq_len = input.size(0), input.size(1)
+        state0, state1, state2 = state if state is not None else (None, None, None)
 
-        recurrent_features, _ = self.lstm0(input, (h_0, c_0))
-        recurrent_features, _ = self.lstm1(recurrent_features)
-        recurrent_features, _ = self.lstm2(recurrent_features)
+        recurrent_features, state0 = self.lstm0(input, state0)
+        recurrent_features, state1 = self.lstm1(recurrent_features, state1)
+        recurrent_features, state2 = self.lstm2(recurrent_features, state2)
 
         outputs = self.linear(
             recurrent_features.contiguous().view(batch_size * seq_len, self.hidden_dim)
         )
         outputs = outputs.view(batch_size, seq_len, self.out_dim)
 
-        return outputs
+        return outputs, (state0, state1, state2)
 
 
 class LSTMDiscriminator(nn.Module):
@@ -81,18 +95,62 @@ class LSTMDiscriminator(nn.Module):
         self.lstm = nn.LSTM(in_dim, hidden_dim, n_layers, batch_first=True)
         self.linear = nn.Sequential(nn.Linear(hidden_dim, 1), nn.Sigmoid())
 
-    def forward(self, input):
+    def forward(self, input, state=None):
+        outputs, _ = self.forward_state(input, state)
+        return outputs
+
+    def forward_state(self, input, state=None):
+        """Forward that also returns the (h, c) state of the LSTM, see LSTMGenerator"""
         batch_size, seq_len = input.size(0), input.size(1)
-        h_0 = torch.zeros(self.n_layers, batch_size, self.hidden_dim).to(self.device)
-        c_0 = torch.zeros(self.n_layers, batch_size, self.hidden_dim).to(self.device)
 
-        recurrent_features, _ = self.lstm(input, (h_0, c_0))
+        recurrent_features, state = self.lstm(input, state)
         outputs = self.linear(
             recurrent_features.contiguous().view(batch_size * seq_len, self.hidden_dim)
         )
-        outputs = outputs.view(batch_size, seq_len, self.in_dim)
+        outputs = outputs.view(batch_size, seq_len, 1)
 
-        return outputs
+        return outputs, state
+
+
+def training_forward(net, precision="float32", compile=False):
+    """Wrap the forward of `net` with a training precision and compilation mode
+
+    Args:
+        net: LSTMGenerator or LSTMDiscriminator
+        precision: 'float32', or 'bfloat16' / 'float16' to run under autocast
+        compile: run the forward through `torch.compile`
+
+    The wrapper returns float32 outputs so losses stay in full precision.
+    `net` itself is left eager and in float32; the gradient penalty calls it
+    directly since its double backward goes through neither autocast nor
+    compiled graphs.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {list(PRECISIONS)}")
+
+    forward = net
+    if compile is True:
+        if hasattr(torch, "compile"):
+            forward = torch.compile(net)
+        else:
+            warnings.warn("torch.compile is not available, running eager")
+
+    dtype = PRECISIONS[precision]
+    if dtype is not None and not hasattr(torch, "autocast"):
+        warnings.warn(f"torch.autocast is not available, running {precision} as float32")
+        dtype = None
+
+    if dtype is None:
+        return forward
+
+    device_type = torch.device(net.device or "cpu").type
+
+    def autocast_forward(input):
+        with torch.autocast(device_type=device_type, dtype=dtype):
+            outputs = forward(input.contiguous())
+        return outputs.float()
+
+    return autocast_forward
 
 
 if __name__ == "__main__":
@@ -1,3 +1,4 @@
+import os
 import logging.config
 import structlog
 
@@ -13,6 +14,7 @@ class Logger:
     def init_config(self, file):
         logfile = file.replace(".py", "")
         logfile = logfile.split(".")[-1]
+        os.makedirs("logs", exist_ok=True)
 
         logging.config.dictConfig(
             {
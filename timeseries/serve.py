@@ -0,0 +1,292 @@
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import argparse
+import threading
+import collections
+import numpy as np
+import torch
+
+from timeseries.logger import Logger
+from timeseries.utils.checkpoint import load_generator
+
+logger = Logger(__file__)
+
+SIGMAS = (1, 2, 3)
+
+
+class SeriesState:
+    """Rolling window and carried generator state of one series"""
+
+    def __init__(self, seq_len):
+        self.window = collections.deque(maxlen=seq_len)
+        self.state = None
+        self.band = None
+        self.count = 0
+
+
+class BandPredictor:
+    """
+    Streaming band prediction with one generator shared by every series
+
+    Each point advances the carried LSTM state of its series by one step
+    instead of re-running the whole window. The band of the next point is
+    then sampled from `n_samples` one-step noise rollouts of that state, so
+    the per-point cost is two single-step forwards. Every `resync` points the
+    state is rebuilt from the rolling `seq_len` window, matching the
+    zero-state windows the generator was trained on.
+
+    Args:
+        netG: trained LSTMGenerator
+        vmin, vmax: normalization statistics of the training dataset, one feature
+        seq_len: rolling window length
+        n_samples: noise rollouts per band
+        sigma: width of the band outside which a point is flagged
+        resync: points between state rebuilds, `seq_len` if None
+    """
+
+    def __init__(self, netG, vmin, vmax, seq_len, n_samples=32, sigma=3, resync=None, device=None):
+        vmin, vmax = np.ravel(vmin), np.ravel(vmax)
+        if len(vmin) != 1:
+            raise ValueError(f"Streaming serves univariate series, the generator was trained on {len(vmin)} features")
+
+        self.netG = netG.eval()
+        self.min, self.max = float(vmin[0]), float(vmax[0])
+        self.seq_len = seq_len
+        self.n_samples = n_samples
+        self.sigma = sigma
+        self.resync = resync or seq_len
+        self.device = device
+        self.series = dict()
+
+    def normalize(self, x):
+        return 2 * (x - self.min) / (self.max - self.min) - 1
+
+    def denormalize(self, x):
+        return 0.5 * (x * self.max - x * self.min + self.max + self.min)
+
+    @torch.no_grad()
+    def update(self, series, value, timestamp=None):
+        """Consume one point; returns its band, anomaly flag and the next band"""
+        s = self.series.get(series)
+        if s is None:
+            s = self.series[series] = SeriesState(self.seq_len)
+
+        band = s.band
+        anomaly = False
+        if band is not None:
+            lower, upper = band["sigma"][str(self.sigma)]
+            anomaly = bool(value < lower or value > upper)
+
+        s.window.append(self.normalize(value))
+        s.count += 1
+
+        if s.count % self.resync == 0:
+            window = torch.tensor(list(s.window), device=self.device).view(1, -1, 1)
+            _, s.state = self.netG.forward_state(window)
+        else:
+            point = torch.full((1, 1, 1), s.window[-1], device=self.device)
+            _, s.state = self.netG.forward_state(point, s.state)
+
+        s.band = self.predict(s.state)
+        return {
+            "series": series,
+            "time": timestamp,
+            "value": value,
+            "band": band,
+            "anomaly": anomaly,
+            "next": s.band,
+        }
+
+    def predict(self, state):
+        """Band of the next point from noise rollouts of the carried `state`"""
+        states = tuple(
+            (h.expand(-1, self.n_samples, -1).contiguous(), c.expand(-1, self.n_samples, -1).contiguous())
+            for h, c in state
+        )
+        noise = torch.randn((self.n_samples, 1, 1), device=self.device)
+        y, _ = self.netG.forward_state(noise, states)
+        y = self.denormalize(y.view(-1)).cpu().numpy()
+
+        median, std = float(np.median(y)), float(y.std())
+        return {
+            "median": median,
+            "lower": float(y.min()),
+            "upper": float(y.max()),
+            "sigma": {str(k): [median - k * std, median + k * std] for k in SIGMAS},
+        }
+
+
+def parse_line(line):
+    """`value`, `time,value` or `series,time,value` records"""
+    fields = [field.strip() for field in line.split(",")]
+    if len(fields) == 1:
+        return "default", None, float(fields[0])
+    if len(fields) == 2:
+        return "default", fields[0], float(fields[1])
+    return fields[0], fields[1], float(fields[2])
+
+
+def read_stdin():
+    for line in sys.stdin:
+        yield line
+
+
+def read_tail(path, interval=0.1, from_start=False):
+    """Follow a growing file like `tail -f`"""
+    with open(path) as f:
+        if not from_start:
+            f.seek(0, os.SEEK_END)
+        while True:
+            line = f.readline()
+            if not line:
+                time.sleep(interval)
+                continue
+            yield line
+
+
+def read_socket(host, port):
+    """Serve newline separated records to one local client at a time"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server:
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((host, port))
+        server.listen(1)
+        logger.info(f"Listening on {host}:{port}")
+        while True:
+            conn, addr = server.accept()
+            with conn, conn.makefile("r") as f:
+                for line in f:
+                    yield line
+
+
+_END = object()
+
+
+def read_ahead(lines):
+    """Queue filled with `lines` by a background thread, ending with _END or the error raised"""
+    pending = queue.Queue()
+
+    def run():
+        try:
+            for line in lines:
+                pending.put(line)
+        except Exception as e:
+            pending.put(e)
+            return
+        pending.put(_END)
+
+    threading.Thread(target=run, daemon=True).start()
+    return pending
+
+
+def micro_batches(lines, size, max_delay=0.1):
+    """
+    Group lines so the output is flushed once per micro-batch
+
+    Lines are read by a background thread, and a partial batch is flushed
+    once its first record has waited `max_delay` seconds, so on a sparse
+    stream no record waits for the batch to fill.
+    """
+    pending = read_ahead(lines)
+    batch, deadline = list(), None
+    while True:
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            line = pending.get(timeout=timeout)
+        except queue.Empty:
+            yield batch
+            batch, deadline = list(), None
+            continue
+
+        if line is _END:
+            break
+        if isinstance(line, Exception):
+            raise line
+
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        batch.append(line)
+        if deadline is None:
+            deadline = time.monotonic() + max_delay
+        if len(batch) >= size:
+            yield batch
+            batch, deadline = list(), None
+    if batch:
+        yield batch
+
+
+def serve(predictor, lines, batch_size=1, max_delay=0.1, out=sys.stdout):
+    for batch in micro_batches(lines, batch_size, max_delay):
+        for line in batch:
+            try:
+                series, timestamp, value = parse_line(line)
+            except ValueError:
+                logger.warn(f"Skipped malformed record : {line}")
+                continue
+            out.write(json.dumps(predictor.update(series, value, timestamp)) + "\n")
+        out.flush()
+
+
+def load_predictor(opt, device):
+    netG, stats = load_generator(opt.model, device)
+
+    vmin, vmax, seq_len = opt.min, opt.max, opt.seq_len
+    if stats is not None:
+        vmin = stats["min"] if vmin is None else vmin
+        vmax = stats["max"] if vmax is None else vmax
+        seq_len = stats["seq_len"] if seq_len is None else seq_len
+
+    if vmin is None or vmax is None or seq_len is None:
+        from timeseries.datasets import TimeseriesDataset
+
+        with open(opt.config) as f:
+            config = json.load(f)
+        dataset = TimeseriesDataset(config["dataset"], device)
+        vmin = dataset.min if vmin is None else vmin
+        vmax = dataset.max if vmax is None else vmax
+        seq_len = dataset.seq_len if seq_len is None else seq_len
+
+    return BandPredictor(
+        netG,
+        vmin,
+        vmax,
+        seq_len,
+        n_samples=opt.samples,
+        sigma=opt.sigma,
+        resync=opt.resync,
+        device=device,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="** BandGAN streaming band service **")
+    parser.add_argument("-m", "--model", type=str, required=True, help="checkpoint or saved generator (.pth)")
+    parser.add_argument("-cfg", "--config", type=str, default="config/config.json", help="config.json path for the dataset statistics")
+    parser.add_argument("--min", type=float, default=None, help="normalization min, read from the dataset if omitted")
+    parser.add_argument("--max", type=float, default=None, help="normalization max, read from the dataset if omitted")
+    parser.add_argument("--seq-len", type=int, default=None, help="rolling window length")
+    parser.add_argument("--samples", type=int, default=32, help="noise rollouts per band")
+    parser.add_argument("--sigma", type=int, choices=SIGMAS, default=3, help="band used to flag anomalies")
+    parser.add_argument("--resync", type=int, default=None, help="points between state rebuilds")
+    parser.add_argument("--batch", type=int, default=1, help="records per output flush")
+    parser.add_argument("--max-delay", type=float, default=0.1, help="seconds a record waits for its batch to fill")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--tail", type=str, default=None, help="follow a file")
+    source.add_argument("--port", type=int, default=None, help="listen on localhost:PORT")
+    opt = parser.parse_args()
+
+    device = torch.device("cpu")
+    predictor = load_predictor(opt, device)
+
+    if opt.tail is not None:
+        lines = read_tail(opt.tail)
+    elif opt.port is not None:
+        lines = read_socket("127.0.0.1", opt.port)
+    else:
+        lines = read_stdin()
+
+    serve(predictor, lines, batch_size=opt.batch, max_delay=opt.max_delay)
@@ -0,0 +1,223 @@
+import os
+import copy
+import json
+import time
+import argparse
+import itertools
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+
+from timeseries.logger import Logger
+
+logger = Logger(__file__)
+
+
+def set_option(config, key, value):
+    """Set a dotted `key` such as 'train.wgan.gp_weight' in a nested config"""
+    *parents, name = key.split(".")
+    for parent in parents:
+        config = config.setdefault(parent, dict())
+    config[name] = value
+
+
+def sample_value(space, rng):
+    """A list is a set of choices, a dict a {low, high, log, int} range"""
+    if isinstance(space, list):
+        return space[rng.integers(len(space))]
+
+    low, high = space["low"], space["high"]
+    if space.get("log", False):
+        value = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+    else:
+        value = float(rng.uniform(low, high))
+    return int(round(value)) if space.get("int", False) else value
+
+
+def make_trials(space, n_trials=None, seed=31):
+    """
+    Parameter sets of a search space
+
+    Every list-valued space is enumerated as a grid when `n_trials` is None;
+    otherwise `n_trials` sets are sampled at random.
+    """
+    keys = list(space)
+    if n_trials is None:
+        for key in keys:
+            if not isinstance(space[key], list):
+                raise ValueError(f"Grid search needs a list of values for '{key}', set --trials")
+        return [dict(zip(keys, values)) for values in itertools.product(*space.values())]
+
+    rng = np.random.default_rng(seed)
+    return [{key: sample_value(space[key], rng) for key in keys} for _ in range(n_trials)]
+
+
+class MedianPruner:
+    """
+    Stop trials whose epoch loss is worse than the median of other trials
+
+    Epoch losses of every trial are shared through a manager dict, so
+    trials in separate processes prune against each other while running.
+
+    Args:
+        reports: shared dict of epoch -> reported losses
+        lock: shared lock guarding `reports`
+        metric: running loss compared, lower is better
+        warmup: epochs before a trial can be pruned
+        min_trials: reports an epoch needs before it is used for pruning
+    """
+
+    def __init__(self, reports, lock, metric="l2", warmup=2, min_trials=3):
+        self.reports = reports
+        self.lock = lock
+        self.metric = metric
+        self.warmup = warmup
+        self.min_trials = min_trials
+        self.pruned = False
+        self.values = list()
+
+    def __call__(self, epoch, summary):
+        value = summary[self.metric]["mean"]
+        self.values.append(value)
+
+        with self.lock:
+            others = self.reports.get(epoch, list())
+            self.reports[epoch] = others + [value]
+
+        if epoch < self.warmup or len(others) < self.min_trials:
+            return True
+
+        self.pruned = value > np.median(others)
+        return not self.pruned
+
+
+def init_worker(threads):
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+
+    import torch
+
+    torch.set_num_threads(threads)
+
+
+def run_trial(trial_id, params, config, pruner):
+    from timeseries.core import BandGAN
+
+    start_time = time.time()
+    result = {"trial": trial_id, **params}
+    try:
+        model = BandGAN(config=config)
+        model.train(callback=pruner)
+        result["status"] = "pruned" if pruner.pruned else "complete"
+        result["epochs"] = model.epoch
+    except Exception as e:
+        logger.warn(f"Trial {trial_id} failed : {e!r}")
+        result["status"] = "failed"
+        result["epochs"] = len(pruner.values)
+
+    values = pruner.values
+    result[pruner.metric] = values[-1] if values else float("nan")
+    result[f"best_{pruner.metric}"] = min(values) if values else float("nan")
+    result["seconds"] = time.time() - start_time
+    return result
+
+
+def trial_config(base, params, trial_id, cache, workdir):
+    config = copy.deepcopy(base)
+    for key, value in params.items():
+        set_option(config, key, value)
+
+    # trials share one preprocessed dataset; windows are views, so every
+    # seq_len reads the same cache entry
+    config["dataset"]["cache"] = cache
+    config["print"]["verbose"] = 0
+    if config["model"]["save"]["opt"] is True:
+        config["model"]["save"]["path"] = os.path.join(workdir, f"trial_{trial_id}")
+    return config
+
+
+def prepare_cache(config, cache):
+    """Build the shared dataset cache once, before trials race for it"""
+    import torch
+    from timeseries.datasets import TimeseriesDataset
+
+    dataset_cfg = dict(config["dataset"], cache=cache)
+    TimeseriesDataset(dataset_cfg, torch.device("cpu"))
+
+
+def sweep(config, space, workdir, n_trials=None, workers=2, threads=1, metric="l2", warmup=2, min_trials=3, seed=31):
+    """
+    Run the trials of a search space in a process pool
+
+    Returns the results table, also written to `workdir/results.csv`.
+    """
+    os.makedirs(workdir, exist_ok=True)
+    # absolute, so every spawned trial finds the same entry
+    cache = os.path.abspath(config["dataset"].get("cache") or os.path.join(workdir, "cache"))
+    prepare_cache(config, cache)
+
+    trials = make_trials(space, n_trials, seed)
+    logger.info(f"Sweep : {len(trials)} trials : {workers} workers x {threads} threads")
+
+    context = mp.get_context("spawn")
+    manager = context.Manager()
+    reports, lock = manager.dict(), manager.Lock()
+
+    results = list()
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=init_worker, initargs=(threads,)) as pool:
+        futures = [
+            pool.submit(
+                run_trial,
+                i,
+                params,
+                trial_config(config, params, i, cache, workdir),
+                MedianPruner(reports, lock, metric, warmup, min_trials),
+            )
+            for i, params in enumerate(trials)
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            logger.info(f"Trial {result['trial']} {result['status']} : {metric} {result[metric]:.4f}")
+            results.append(result)
+
+    manager.shutdown()
+
+    table = pd.DataFrame(results).sort_values(metric, na_position="last")
+    table.to_csv(os.path.join(workdir, "results.csv"), index=False)
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="** BandGAN hyperparameter sweep **")
+    parser.add_argument("-cfg", "--config", type=str, default="config/config.json", help="base config.json path")
+    parser.add_argument("-s", "--space", type=str, required=True, help="search space json, dotted keys to choices or ranges")
+    parser.add_argument("-o", "--output", type=str, default="sweeps", help="sweep directory")
+    parser.add_argument("--trials", type=int, default=None, help="random trials, grid search if omitted")
+    parser.add_argument("--workers", type=int, default=2, help="trials run in parallel")
+    parser.add_argument("--threads", type=int, default=None, help="torch threads per trial")
+    parser.add_argument("--metric", type=str, default="l2", help="running loss used to rank and prune")
+    parser.add_argument("--warmup", type=int, default=2, help="epochs before pruning")
+    parser.add_argument("--min-trials", type=int, default=3, help="reports needed to prune at an epoch")
+    parser.add_argument("--seed", type=int, default=31)
+    opt = parser.parse_args()
+
+    with open(opt.config) as f:
+        config = json.load(f)
+    with open(opt.space) as f:
+        space = json.load(f)
+
+    threads = opt.threads or max(1, (os.cpu_count() or 1) // opt.workers)
+    table = sweep(
+        config,
+        space,
+        opt.output,
+        n_trials=opt.trials,
+        workers=opt.workers,
+        threads=threads,
+        metric=opt.metric,
+        warmup=opt.warmup,
+        min_trials=opt.min_trials,
+        seed=opt.seed,
+    )
+    print(table.to_string(index=False))
@@ -0,0 +1,69 @@
+import numpy as np
+import torch
+
+BANDS = ("lower", "upper", "median", "up1", "up2", "up3", "down1", "down2", "down3")
+
+
+def compute_bands(y, cond):
+    """
+    Band statistics of a batch of generated windows
+
+    Args:
+        y: denormalized generator outputs shaped (window, seq_len) or
+           (window, seq_len, 1), numpy or torch
+        cond: number of conditioned leading steps, excluded from the
+              min / max / median of the predicted part
+
+    Returns a dict of (window,) arrays: min/max of the predicted part and
+    its median +-1/2/3 times the std of the whole window.
+    """
+    if isinstance(y, torch.Tensor):
+        y = y.detach().cpu().numpy()
+    y = np.asarray(y).reshape(len(y), -1)
+
+    pred = y[:, cond:]
+    std = y.std(axis=1)
+    median = np.median(pred, axis=1)
+
+    bands = {"lower": pred.min(axis=1), "upper": pred.max(axis=1), "median": median}
+    for k in (1, 2, 3):
+        bands[f"up{k}"] = median + k * std
+        bands[f"down{k}"] = median - k * std
+    return bands
+
+
+class BandBuffer:
+    """
+    Preallocated ring buffers of band statistics, one row per window
+
+    Args:
+        capacity: number of windows kept before the oldest are overwritten
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(1, capacity)
+        self.buffer = np.full((len(BANDS), self.capacity), np.nan)
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def extend(self, bands):
+        """Append the rows of a `compute_bands` result"""
+        values = np.stack([bands[name] for name in BANDS])
+        n = values.shape[1]
+        if n > self.capacity:
+            self.count += n - self.capacity
+            values, n = values[:, -self.capacity :], self.capacity
+
+        slots = (self.count + np.arange(n)) % self.capacity
+        self.buffer[:, slots] = values
+        self.count += n
+
+    def values(self):
+        """Dict of band name -> recorded rows, oldest first"""
+        values = self.buffer
+        if self.count > self.capacity:
+            values = np.roll(values, -(self.count % self.capacity), axis=1)
+        values = values[:, : len(self)]
+        return dict(zip(BANDS, values))
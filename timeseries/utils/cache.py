@@ -0,0 +1,114 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+
+CACHE_VERSION = 3
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Content hash of a file, read in chunks so large files never sit in RAM"""
+    digest = hashlib.sha1()
+    with open(path, mode="rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(data_path, options):
+    """Key a preprocessed dataset by its source file and the options that shaped it"""
+    digest = hashlib.sha1()
+    digest.update(file_digest(data_path).encode())
+    digest.update(json.dumps({"version": CACHE_VERSION, **options}, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """
+    On-disk cache of a preprocessed timeseries
+
+    Arrays are stored as `.npy` files and reopened memory-mapped, so a warm
+    start only maps pages in and several processes share one page-cached copy.
+    """
+
+    def __init__(self, path, key):
+        # absolute, so staged memmaps can be recognized by their filename
+        path = os.path.abspath(path)
+        self.root = path
+        self.path = os.path.join(path, key)
+        self.staging = None
+
+    def exists(self):
+        return os.path.exists(os.path.join(self.path, "meta.json"))
+
+    def load(self, mmap_mode="c"):
+        with open(os.path.join(self.path, "meta.json")) as f:
+            series = json.load(f)
+
+        for name in series.pop("arrays"):
+            array_path = os.path.join(self.path, f"{name}.npy")
+            series[name] = np.load(array_path, mmap_mode=mmap_mode)
+
+        return series
+
+    def stage(self):
+        """Temporary directory the entry is written to before being published"""
+        if self.staging is None:
+            os.makedirs(self.root, exist_ok=True)
+            self.staging = tempfile.mkdtemp(dir=self.root, prefix=".tmp-")
+        return self.staging
+
+    def allocate(self, name, shape, dtype):
+        """Preallocate array `name` of the new entry as a writable memmap"""
+        array_path = os.path.join(self.stage(), f"{name}.npy")
+        return np.lib.format.open_memmap(array_path, mode="w+", dtype=dtype, shape=shape)
+
+    @staticmethod
+    def is_staged(array, tmp_path):
+        return os.path.realpath(os.path.dirname(array.filename)) == os.path.realpath(tmp_path)
+
+    def save(self, series):
+        """
+        Write `series` (arrays and JSON scalars) and publish it atomically
+
+        Arrays preallocated with `allocate` are flushed and closed before the
+        staging directory is renamed, since Windows cannot rename a directory
+        holding open mapped files. They are reopened from the published entry
+        and replaced in `series` in place.
+        """
+        tmp_path = self.stage()
+        self.staging = None
+
+        staged = list()
+        try:
+            meta = {"arrays": []}
+            for name, value in series.items():
+                if isinstance(value, np.memmap) and self.is_staged(value, tmp_path):
+                    value.flush()
+                    staged.append(name)
+                    meta["arrays"].append(name)
+                elif isinstance(value, np.ndarray):
+                    np.save(os.path.join(tmp_path, f"{name}.npy"), value)
+                    meta["arrays"].append(name)
+                else:
+                    meta[name] = value
+
+            with open(os.path.join(tmp_path, "meta.json"), mode="w") as f:
+                json.dump(meta, f)
+
+            # the last references to the staged maps, closing their files
+            value = None
+            for name in staged:
+                series[name] = None
+
+            os.rename(tmp_path, self.path)
+        except OSError:
+            # Another process published the same key first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if not self.exists():
+                raise
+
+        for name in staged:
+            series[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="c")
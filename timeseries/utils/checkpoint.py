@@ -0,0 +1,179 @@
+import os
+import re
+import queue
+import random
+import shutil
+import threading
+import numpy as np
+import torch
+
+
+def rng_state():
+    """RNG state of python, numpy and torch (cpu and cuda), as plain types and tensors"""
+    kind, keys, pos, has_gauss, cached = np.random.get_state()
+    state = {
+        "python": random.getstate(),
+        "numpy": [kind, torch.from_numpy(keys.astype(np.int64)), pos, has_gauss, cached],
+        "torch": torch.get_rng_state(),
+    }
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def set_rng_state(state):
+    random.setstate(state["python"])
+    kind, keys, pos, has_gauss, cached = state["numpy"]
+    np.random.set_state((kind, keys.numpy().astype(np.uint32), pos, has_gauss, cached))
+    torch.set_rng_state(state["torch"])
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
+
+
+def snapshot(obj):
+    """Copy of a (nested) state dict with every tensor cloned to the cpu"""
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {k: snapshot(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(snapshot(v) for v in obj)
+    return obj
+
+
+def is_checkpoint(obj):
+    return isinstance(obj, dict) and "netG" in obj and "epoch" in obj
+
+
+def load_generator(path, device=None):
+    """
+    LSTMGenerator from a checkpoint or a pickled module
+
+    Returns the generator and the checkpoint's dataset statistics, which
+    are None for a pickled module.
+    """
+    obj = torch.load(path, map_location=device)
+    if not is_checkpoint(obj):
+        if hasattr(obj, "device"):
+            obj.device = device
+        return obj, None
+
+    from timeseries.layers.LSTMGAN import LSTMGenerator
+
+    stats = obj["dataset"]
+    netG = LSTMGenerator(
+        stats["n_feature"], out_dim=stats["n_feature"], hidden_dim=stats["hidden_dim"], device=device
+    ).to(device)
+    netG.load_state_dict(obj["netG"])
+    return netG, stats
+
+
+class CheckpointManager:
+    """
+    Asynchronous, atomic training checkpoints
+
+    `save` snapshots the state dicts on the calling thread and hands them to
+    a writer thread, so training only pays for the device to host copy.
+    Each checkpoint is written to a temporary file and renamed into place,
+    so a crash never leaves a truncated `{prefix}_e{epoch}.pth`. Only the
+    last `keep` checkpoints are kept, and `{prefix}_latest.pth` is a symlink
+    to the newest one.
+
+    Args:
+        path: checkpoint directory
+        keep: number of epoch checkpoints kept
+        prefix: file name prefix
+    """
+
+    def __init__(self, path, keep=3, prefix="bandgan"):
+        self.path = path
+        self.keep = keep
+        self.prefix = prefix
+        self.pattern = re.compile(rf"^{re.escape(prefix)}_e(\d+)\.pth$")
+        self.error = None
+
+        os.makedirs(path, exist_ok=True)
+        self.queue = queue.Queue(maxsize=2)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    @property
+    def latest_path(self):
+        return os.path.join(self.path, f"{self.prefix}_latest.pth")
+
+    def checkpoints(self):
+        """Epoch checkpoints in the directory, oldest first"""
+        found = list()
+        for name in os.listdir(self.path):
+            match = self.pattern.match(name)
+            if match is not None:
+                found.append((int(match.group(1)), os.path.join(self.path, name)))
+        return [path for _, path in sorted(found)]
+
+    def save(self, epoch, **state):
+        """Queue a checkpoint of `epoch`; state dicts are copied before returning"""
+        self._raise()
+        state = snapshot(state)
+        state["epoch"] = epoch
+        state["rng"] = rng_state()
+        self.queue.put(state)
+
+    def wait(self):
+        """Block until every queued checkpoint is written"""
+        self.queue.join()
+        self._raise()
+
+    def close(self):
+        self.wait()
+        self.queue.put(None)
+        self.thread.join()
+
+    def load(self, path=None, map_location=None):
+        """Checkpoint at `path`, the latest one if None; None if there is none"""
+        path = path or self.latest_path
+        if not os.path.exists(path):
+            return None
+        return torch.load(path, map_location=map_location)
+
+    def _raise(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _run(self):
+        while True:
+            state = self.queue.get()
+            try:
+                if state is None:
+                    return
+                self._write(state)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.queue.task_done()
+
+    def _write(self, state):
+        name = f"{self.prefix}_e{state['epoch']}.pth"
+        target = os.path.join(self.path, name)
+        temp = f"{target}.tmp"
+
+        with open(temp, "wb") as f:
+            torch.save(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, target)
+
+        self._link_latest(name)
+        for path in self.checkpoints()[: -self.keep]:
+            os.remove(path)
+
+    def _link_latest(self, name):
+        temp = f"{self.latest_path}.tmp"
+        if os.path.lexists(temp):
+            os.remove(temp)
+        try:
+            os.symlink(name, temp)
+        except (OSError, NotImplementedError):
+            # no symlink permission (e.g. Windows), fall back to a copy
+            shutil.copyfile(os.path.join(self.path, name), temp)
+        os.replace(temp, self.latest_path)
@@ -0,0 +1,148 @@
+import json
+import time
+import queue
+import types
+import multiprocessing as mp
+import numpy as np
+
+
+class SampleLog:
+    """
+    Append-only float32 log of sample windows
+
+    Windows are written as raw bytes to `path`, with their shape and dtype
+    stored once in `path.json`, so logging a step is a single buffered write
+    instead of rewriting a CSV file. Read it back with `read_samples`.
+
+    Args:
+        path: binary log file, truncated when the log is opened
+        shape: shape of one logged window, e.g. (seq_len, n_feature)
+    """
+
+    def __init__(self, path, shape):
+        self.path = path
+        self.shape = tuple(shape)
+        with open(f"{path}.json", "w") as f:
+            json.dump({"shape": list(self.shape), "dtype": "float32"}, f)
+        self.file = open(path, "wb")
+
+    def write(self, x):
+        np.ascontiguousarray(x, dtype=np.float32).reshape(self.shape).tofile(self.file)
+
+    def close(self):
+        self.file.close()
+
+
+def read_samples(path, mmap=True):
+    """Logged windows of a `SampleLog` as a (sample, *shape) array"""
+    with open(f"{path}.json") as f:
+        meta = json.load(f)
+    shape = tuple(meta["shape"])
+
+    if mmap is True:
+        data = np.memmap(path, dtype=meta["dtype"], mode="r")
+    else:
+        data = np.fromfile(path, dtype=meta["dtype"])
+    return data.reshape((-1,) + shape)
+
+
+def dashboard_spec(dataset):
+    """The dataset attributes a Dashboard reads, detached from the dataset"""
+    return types.SimpleNamespace(
+        title=dataset.title,
+        seq_len=dataset.seq_len,
+        data_len=dataset.data_len,
+        time=dataset.time,
+        min=dataset.min,
+        max=dataset.max,
+    )
+
+
+def next_frames(frames, timeout):
+    """
+    Frames queued within `timeout`, drained without waiting once one arrives
+
+    Returns (frames, running); `running` is False after the None sentinel.
+    """
+    try:
+        frame = frames.get(timeout=timeout)
+    except queue.Empty:
+        return [], True
+
+    batch = list()
+    while frame is not None:
+        batch.append(frame)
+        try:
+            frame = frames.get_nowait()
+        except queue.Empty:
+            return batch, True
+    return batch, False
+
+
+def render_loop(spec, frames, fps):
+    from timeseries.utils.visualize import Dashboard
+
+    dashboard = Dashboard(spec)
+    interval = 1.0 / fps
+    last = 0.0
+    dirty = False
+
+    # wake up at least once per interval, so updates left undrawn by a
+    # burst are rendered and the window stays responsive while training
+    # produces no frames
+    running = True
+    while running:
+        batch, running = next_frames(frames, interval)
+        for frame in batch:
+            dashboard.update(*frame)
+        dirty = dirty or len(batch) > 0
+
+        now = time.monotonic()
+        if dirty and (now - last >= interval or not running):
+            dashboard.render()
+            last = now
+            dirty = False
+        elif not dirty:
+            dashboard.fig.canvas.flush_events()
+
+
+class LiveDashboard:
+    """
+    Dashboard rendered by a separate process
+
+    The training loop only puts (time, data, pred) frames into a bounded
+    queue and never waits on matplotlib. The render process applies every
+    queued frame to the dashboard state, but redraws at most `fps` times per
+    second. When the queue is full the frame is dropped instead of blocking
+    training; `dropped` counts them.
+
+    Args:
+        dataset: TimeseriesDataset the frames come from
+        fps: maximum redraws per second
+        maxsize: queued frames before new ones are dropped
+    """
+
+    def __init__(self, dataset, fps=4, maxsize=256):
+        self.frames = mp.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.process = mp.Process(
+            target=render_loop, args=(dashboard_spec(dataset), self.frames, fps), daemon=True
+        )
+        self.process.start()
+
+    def submit(self, time, data, pred):
+        """Queue the first window of `data` / `pred` (denormalized tensors)"""
+        frame = (time, data[0].detach().cpu().numpy(), pred[0].detach().cpu().numpy())
+        try:
+            self.frames.put_nowait(frame)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=5):
+        try:
+            self.frames.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
@@ -0,0 +1,63 @@
+import torch
+
+
+class MetricBuffer:
+    """
+    Ring buffer of detached scalar metrics
+
+    Values are written into one preallocated (metric, step) tensor on the
+    training device, so recording a step neither keeps its autograd graph
+    alive nor waits for the device. Reading statistics copies the buffer to
+    the host once, which is the only synchronization point.
+
+    Args:
+        names: metric names, e.g. ["D", "G", "GP"]
+        capacity: number of steps kept before the oldest ones are overwritten
+        device: device the buffer lives on
+    """
+
+    def __init__(self, names, capacity, device=None):
+        self.names = list(names)
+        self.capacity = max(1, capacity)
+        self.buffer = torch.zeros((len(self.names), self.capacity), device=device)
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def update(self, **metrics):
+        """Record one step; every metric of the buffer must be given"""
+        values = torch.stack([torch.as_tensor(metrics[name]).detach() for name in self.names])
+        self.buffer[:, self.count % self.capacity] = values.to(self.buffer)
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+    def values(self):
+        """Host copy of the recorded steps, oldest first, shaped (metric, step)"""
+        values = self.buffer.detach().cpu()
+        if self.count > self.capacity:
+            values = values.roll(-(self.count % self.capacity), dims=1)
+        return values[:, : len(self)]
+
+    def last(self):
+        if self.count == 0:
+            return {name: float("nan") for name in self.names}
+        values = self.buffer[:, (self.count - 1) % self.capacity].cpu()
+        return dict(zip(self.names, values.tolist()))
+
+    def mean(self):
+        return {name: stat["mean"] for name, stat in self.summary().items()}
+
+    def std(self):
+        return {name: stat["std"] for name, stat in self.summary().items()}
+
+    def summary(self):
+        """Mean and std of every metric over the recorded steps"""
+        values = self.values()
+        mean = values.mean(dim=1).tolist()
+        std = values.std(dim=1).tolist() if values.size(1) > 1 else [0.0] * len(self.names)
+        return {
+            name: {"mean": mean[i], "std": std[i]} for i, name in enumerate(self.names)
+        }
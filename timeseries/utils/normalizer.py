@@ -0,0 +1,158 @@
+import json
+import numpy as np
+import torch
+
+
+class Normalizer:
+    """
+    Running per-feature statistics of a raw series and its [-1, 1] scaling
+
+    `update` folds new raw rows into the running min / max, and optionally
+    the running mean / variance, in O(new rows) : the history is never
+    revisited. `transform` scales with the current statistics, and
+    `renormalize` moves values scaled with older statistics onto the current
+    ones in place, without reloading the raw data.
+
+    The state is plain JSON (`state_dict` / `save`), so it can be stored in
+    a checkpoint or next to it.
+
+    Args:
+        n_feature: number of columns of the series
+        moments: also track mean and variance (NaN-aware, merged with
+                 Chan's parallel update)
+    """
+
+    def __init__(self, n_feature=1, moments=False):
+        self.n_feature = n_feature
+        self.moments = moments
+        self.reset()
+
+    def reset(self):
+        self.min = np.full(self.n_feature, np.inf)
+        self.max = np.full(self.n_feature, -np.inf)
+        self.count = np.zeros(self.n_feature, dtype=np.int64)
+        self.mean = np.zeros(self.n_feature)
+        self.m2 = np.zeros(self.n_feature)
+
+    def update(self, values):
+        """Fold raw rows (time,) or (time, feature) into the statistics"""
+        values = np.asarray(values, dtype=np.float64).reshape(-1, self.n_feature)
+        valid = ~np.isnan(values)
+        n = valid.sum(axis=0)
+
+        has = n > 0
+        if not has.any():
+            return self
+
+        filled = np.where(valid, values, np.inf)
+        self.min = np.where(has, np.minimum(self.min, filled.min(axis=0)), self.min)
+        filled = np.where(valid, values, -np.inf)
+        self.max = np.where(has, np.maximum(self.max, filled.max(axis=0)), self.max)
+
+        if self.moments:
+            mean = np.where(valid, values, 0).sum(axis=0) / np.maximum(n, 1)
+            m2 = np.where(valid, (values - mean) ** 2, 0).sum(axis=0)
+
+            total = self.count + n
+            delta = mean - self.mean
+            ratio = np.divide(n, total, out=np.zeros(self.n_feature), where=total > 0)
+            self.m2 = self.m2 + m2 + delta ** 2 * self.count * ratio
+            self.mean = self.mean + delta * ratio
+
+        self.count = self.count + n
+        return self
+
+    def fit(self, values):
+        self.reset()
+        return self.update(values)
+
+    @property
+    def scale(self):
+        """Range of each feature, 1 where it is constant or unseen"""
+        scale = self.max - self.min
+        return np.where(np.isfinite(scale) & (scale > 0), scale, 1.0)
+
+    @property
+    def var(self):
+        return np.divide(self.m2, self.count, out=np.full(self.n_feature, np.nan), where=self.count > 0)
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+    def _stats(self, x, *stats):
+        if isinstance(x, torch.Tensor):
+            return [torch.as_tensor(s, dtype=x.dtype, device=x.device) for s in stats]
+        return [s.astype(x.dtype, copy=False) if np.issubdtype(x.dtype, np.floating) else s for s in stats]
+
+    def transform(self, x, out=None):
+        """Scale raw values into [-1, 1]; `out` may be `x` for in place"""
+        vmin, scale = self._stats(x, self.min, self.scale)
+        if out is None:
+            return 2 * (x - vmin) / scale - 1
+
+        out[...] = x
+        out -= vmin
+        out *= 2 / scale
+        out -= 1
+        return out
+
+    def inverse_transform(self, x):
+        """Revert `transform`, numpy or torch, features on the last axis"""
+        vmin, scale = self._stats(x, self.min, self.scale)
+        return (x + 1) * scale / 2 + vmin
+
+    def renormalize(self, x, previous):
+        """
+        Rescale `x`, normalized with the `previous` state, to the current
+        statistics in place, with one multiply-add per value
+        """
+        old = previous if isinstance(previous, Normalizer) else Normalizer.from_state_dict(previous)
+        ratio = old.scale / self.scale
+        shift = (2 * (old.min - self.min) + old.scale) / self.scale - 1
+        ratio, shift = self._stats(x, ratio, shift)
+
+        x *= ratio
+        x += shift
+        return x
+
+    def state_dict(self):
+        state = {
+            "n_feature": self.n_feature,
+            "moments": self.moments,
+            "min": self.min.tolist(),
+            "max": self.max.tolist(),
+            "count": self.count.tolist(),
+        }
+        if self.moments:
+            state["mean"] = self.mean.tolist()
+            state["m2"] = self.m2.tolist()
+        return state
+
+    def load_state_dict(self, state):
+        self.n_feature = state["n_feature"]
+        self.moments = state["moments"]
+        self.reset()
+        self.min = np.asarray(state["min"], dtype=np.float64)
+        self.max = np.asarray(state["max"], dtype=np.float64)
+        self.count = np.asarray(state["count"], dtype=np.int64)
+        if self.moments:
+            self.mean = np.asarray(state["mean"], dtype=np.float64)
+            self.m2 = np.asarray(state["m2"], dtype=np.float64)
+        return self
+
+    @classmethod
+    def from_state_dict(cls, state):
+        return cls(state["n_feature"]).load_state_dict(state)
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.state_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_state_dict(json.load(f))
+
+    def copy(self):
+        return Normalizer.from_state_dict(self.state_dict())
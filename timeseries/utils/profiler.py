@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import threading
+import torch
+
+from timeseries.logger import Logger
+
+logger = Logger(__file__)
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.record = None
+
+    def __enter__(self):
+        if self.profiler.capture is not None:
+            self.record = torch.autograd.profiler.record_function(self.name)
+            self.record.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.sync()
+        end = time.perf_counter()
+        if self.record is not None:
+            self.record.__exit__(*exc)
+        self.profiler.add(self.name, self.start, end)
+        return False
+
+
+class Profiler:
+    """
+    Named phase timers and counters for the training loop
+
+    `phase(name)` is a context manager accumulating the wall time of a
+    phase; `count(name)` increments a counter. Disabled, both are no-ops.
+    Every `step()` advances the training step, and between `torch_start`
+    and `torch_end` steps a torch.profiler capture records operator level
+    detail under the same phase names.
+
+    `export` writes the phase spans as a Chrome trace (chrome://tracing,
+    Perfetto) with the totals under "otherData"; the torch capture is
+    written next to it as `*.torch.json`.
+
+    Args:
+        enabled: record timers and counters
+        sync: synchronize CUDA before closing a phase, so device time is
+              attributed to the phase that queued it
+        output: trace file written by `export`
+        torch_start, torch_end: step range captured by torch.profiler,
+                                no capture if None
+        max_events: spans kept for the trace; totals are always complete
+    """
+
+    def __init__(self, enabled=False, sync=True, output=None, torch_start=None, torch_end=None, max_events=200_000):
+        self.enabled = enabled
+        self.output = output
+        self.torch_range = (torch_start, torch_end)
+        self.max_events = max_events
+        self.do_sync = sync and torch.cuda.is_available()
+
+        self.totals = dict()
+        self.calls = dict()
+        self.counters = dict()
+        self.events = list()
+        self.origin = time.perf_counter()
+        self.steps = 0
+        self.capture = None
+        self.captured = None
+
+    @classmethod
+    def from_config(cls, config):
+        """Profiler from the optional `train.profile` config section"""
+        if not config:
+            return cls(enabled=False)
+        torch_range = config.get("torch", dict())
+        return cls(
+            enabled=config.get("enabled", True),
+            sync=config.get("sync", True),
+            output=config.get("output", "logs/profile.json"),
+            torch_start=torch_range.get("start"),
+            torch_end=torch_range.get("end"),
+        )
+
+    def phase(self, name):
+        if not self.enabled:
+            return NULL_PHASE
+        return _Phase(self, name)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def sync(self):
+        if self.do_sync:
+            torch.cuda.synchronize()
+
+    def add(self, name, start, end):
+        self.totals[name] = self.totals.get(name, 0.0) + (end - start)
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if len(self.events) < self.max_events:
+            self.events.append((name, start, end, threading.get_ident()))
+
+    def step(self):
+        """Advance one training step, starting / stopping the torch capture"""
+        if not self.enabled:
+            return
+        start, end = self.torch_range
+        if start is not None and self.steps == start:
+            self._start_capture()
+        self.steps += 1
+        if self.capture is not None and end is not None and self.steps >= end:
+            self._stop_capture()
+
+    def _start_capture(self):
+        if not hasattr(torch, "profiler"):
+            logger.warn("torch.profiler is not available, skipped the operator capture")
+            return
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+        self.capture = torch.profiler.profile(activities=activities)
+        self.capture.__enter__()
+
+    def _stop_capture(self):
+        self.capture.__exit__(None, None, None)
+        self.captured, self.capture = self.capture, None
+
+    def summary(self):
+        """Total seconds, calls and mean milliseconds per phase, plus the counters"""
+        phases = {
+            name: {
+                "total_sec": total,
+                "calls": self.calls[name],
+                "mean_ms": 1000 * total / self.calls[name],
+            }
+            for name, total in sorted(self.totals.items(), key=lambda item: -item[1])
+        }
+        return {"phases": phases, "counters": dict(self.counters), "steps": self.steps}
+
+    def report(self):
+        for name, stat in self.summary()["phases"].items():
+            logger.info(
+                f"Profile {name:<20s} : {stat['total_sec']:8.3f} sec : {stat['calls']:7d} calls"
+                f" : {stat['mean_ms']:8.3f} ms"
+            )
+
+    def export(self, path=None):
+        """Write the Chrome trace of the recorded phases; returns the path"""
+        path = path or self.output
+        if not self.enabled or path is None:
+            return None
+        if self.capture is not None:
+            self._stop_capture()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        pid = os.getpid()
+        events = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (start - self.origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": pid,
+                "tid": tid,
+            }
+            for name, start, end, tid in self.events
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "otherData": self.summary()}, f)
+
+        if self.captured is not None:
+            self.captured.export_chrome_trace(os.path.splitext(path)[0] + ".torch.json")
+        return path
@@ -0,0 +1,96 @@
+import os
+import numpy as np
+import pandas as pd
+
+FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+    ".ipc": "feather",
+}
+
+
+def infer_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Unknown data format for '{path}', expected one of {list(FORMATS)}")
+    return FORMATS[ext]
+
+
+def read_table(path, columns=None, index=None, time_range=None, format=None):
+    """
+    Read a timeseries table as a DataFrame
+
+    Args:
+        path: CSV, Parquet or Feather (Arrow IPC) file
+        columns: columns to read, `None` for all of them
+        index: name of the time column `time_range` applies to
+        time_range: optional (start, end) bound, both inclusive
+        format: 'csv', 'parquet' or 'feather', inferred from the extension if None
+
+    Columnar files are read through pyarrow with the column projection and
+    the time bound pushed down to the scan, and keep their stored dtypes.
+    """
+    format = format or infer_format(path)
+
+    if format == "csv":
+        data = pd.read_csv(path, usecols=columns)
+        if time_range is not None:
+            times = pd.to_datetime(data[index])
+            start, end = pd.to_datetime(time_range[0]), pd.to_datetime(time_range[1])
+            data = data[((times >= start) & (times <= end)).values].reset_index(drop=True)
+        return data
+
+    return read_arrow(path, columns, index, time_range, format)
+
+
+def read_arrow(path, columns, index, time_range, format):
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError(f"Reading '{format}' files requires pyarrow") from e
+
+    dataset = ds.dataset(path, format="parquet" if format == "parquet" else "ipc")
+
+    condition = None
+    if time_range is not None:
+        field = ds.field(index)
+        start, end = pd.Timestamp(time_range[0]), pd.Timestamp(time_range[1])
+        if pa.types.is_timestamp(dataset.schema.field(index).type):
+            condition = (field >= start.to_datetime64()) & (field <= end.to_datetime64())
+        else:
+            # ISO formatted string timestamps compare in time order
+            condition = (field >= str(start)) & (field <= str(end))
+
+    table = dataset.to_table(columns=columns, filter=condition)
+    return table.to_pandas()
+
+
+def write_table(data, path, format=None):
+    """Write `data` as a Parquet or Feather file"""
+    format = format or infer_format(path)
+
+    if format == "parquet":
+        data.to_parquet(path, index=False)
+    elif format == "feather":
+        data.reset_index(drop=True).to_feather(path)
+    else:
+        raise ValueError(f"Cannot write '{format}' as a columnar format")
+
+
+def convert_csv(path, target, index=None, time_format=None, float32=False, format=None):
+    """Rewrite a CSV file as a typed columnar file"""
+    data = pd.read_csv(path)
+
+    if index is not None and index in data.columns:
+        data[index] = pd.to_datetime(data[index], format=time_format)
+
+    if float32 is True:
+        floats = data.select_dtypes(include=[np.float64]).columns
+        data[floats] = data[floats].astype(np.float32)
+
+    write_table(data, target, format=format)
+    return data.dtypes
@@ -0,0 +1,241 @@
+import math
+import queue
+import threading
+import torch
+
+_END = object()
+
+
+class Prefetcher:
+    """
+    Iterate `iterable` from a background thread, `depth` items ahead
+
+    Batch gathering and host to device copies release the GIL, so they
+    overlap with the training step consuming the previous batch.
+    """
+
+    def __init__(self, iterable, depth=2):
+        self.queue = queue.Queue(maxsize=max(1, depth))
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(iterable,), daemon=True)
+        self.thread.start()
+
+    def _run(self, iterable):
+        try:
+            for item in iterable:
+                if not self._put(item):
+                    return
+        except Exception as e:
+            self._put(e)
+            return
+        self._put(_END)
+
+    def _put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = self.queue.get()
+        if item is _END:
+            raise StopIteration
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
+
+
+class SampleStream:
+    """
+    Prefetched random batches of a WindowBatches, in the order they are consumed
+
+    The prefetch thread draws ahead of the consumer, so the sampler's
+    generator state is not the resume point. Each batch carries the
+    generator state right after its draw, and the state of the last batch
+    consumed is kept on the sampler for `state_dict`.
+    """
+
+    def __init__(self, sampler, size):
+        self.sampler = sampler
+        self.samples = Prefetcher(sampler._samples(size), max(1, sampler.prefetch))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        batch, state = next(self.samples)
+        self.sampler.sample_state = state
+        self.sampler.draws += 1
+        return batch
+
+    def close(self):
+        self.samples.close()
+
+
+class WindowBatches:
+    """
+    Batches of dataset windows gathered with one index operation
+
+    Replaces a DataLoader over `TimeseriesDataset`, which fetches windows
+    one `__getitem__` at a time and collates them in Python. Each batch is
+    a single `index_select` over the windowed view, staged in pinned memory
+    when training on CUDA, and produced `prefetch` batches ahead by a
+    background thread. `sample` / `stream` draw random batches the same way
+    for the critic.
+
+    The windows are read from the dataset on every epoch and draw, so rows
+    appended to it with `TimeseriesDataset.append` are picked up.
+
+    Args:
+        dataset: TimeseriesDataset
+        batch_size: windows per batch
+        shuffle: shuffled order per epoch, contiguous order otherwise
+        drop_last: drop the last incomplete batch
+        device: device batches are delivered on
+        prefetch: batches prepared ahead, 0 to gather on the calling thread
+        rank, world_size: shard of the epoch order this process reads,
+                          like DistributedSampler
+        seed: seed of the shuffle and random sampling streams
+    """
+
+    def __init__(
+        self,
+        dataset,
+        batch_size,
+        shuffle=False,
+        drop_last=False,
+        device=None,
+        prefetch=2,
+        rank=0,
+        world_size=1,
+        seed=None,
+    ):
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.device = torch.device("cpu") if device is None else torch.device(device)
+        self.prefetch = prefetch
+        self.rank = rank
+        self.world_size = world_size
+        self.seed = int(torch.randint(2 ** 31 - 1, (1,)).item()) if seed is None else seed
+        self.epoch = 0
+
+        self.generator = torch.Generator()
+        self.generator.manual_seed(self.seed + rank)
+        self.sample_state = self.generator.get_state()
+        self.draws = 0
+
+        self.pin_memory = self.device.type == "cuda"
+        self.copy_stream = torch.cuda.Stream(self.device) if self.pin_memory else None
+        self.staging = dict()
+
+    @property
+    def data(self):
+        return self.dataset.data
+
+    def __len__(self):
+        n = self.num_samples()
+        if self.drop_last:
+            return n // self.batch_size
+        return math.ceil(n / self.batch_size)
+
+    def num_samples(self):
+        return math.ceil(len(self.data) / self.world_size)
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def indices(self):
+        """Window order of the current epoch for this rank"""
+        n = len(self.data)
+        if self.shuffle:
+            generator = torch.Generator()
+            generator.manual_seed(self.seed + self.epoch)
+            order = torch.randperm(n, generator=generator)
+        else:
+            order = torch.arange(n)
+
+        if self.world_size > 1:
+            total = self.num_samples() * self.world_size
+            if total > n:
+                order = torch.cat((order, order[: total - n]))
+            order = order[self.rank : total : self.world_size]
+        return order
+
+    def gather(self, idx):
+        """Windows `idx` as one (batch, seq_len, feature) tensor on the device"""
+        if not self.pin_memory:
+            return torch.index_select(self.data, 0, idx).to(self.device)
+
+        shape = (len(idx),) + tuple(self.data.shape[1:])
+        buffer = self.staging.get(threading.get_ident())
+        if buffer is None or buffer.shape[0] < shape[0]:
+            buffer = torch.empty(shape, dtype=self.data.dtype).pin_memory()
+            self.staging[threading.get_ident()] = buffer
+        buffer = buffer[: shape[0]]
+        torch.index_select(self.data, 0, idx, out=buffer)
+
+        # copy on a side stream and wait for it, so the pinned buffer can be
+        # refilled as soon as this returns
+        with torch.cuda.stream(self.copy_stream):
+            batch = buffer.to(self.device, non_blocking=True)
+        self.copy_stream.synchronize()
+        batch.record_stream(torch.cuda.current_stream(self.device))
+        return batch
+
+    def _batches(self, order):
+        for b in range(len(self)):
+            yield self.gather(order[b * self.batch_size : (b + 1) * self.batch_size])
+
+    def __iter__(self):
+        batches = self._batches(self.indices())
+        if self.prefetch > 0:
+            return Prefetcher(batches, self.prefetch)
+        return batches
+
+    def sample(self, size):
+        """`size` windows drawn uniformly with replacement"""
+        idx = torch.randint(len(self.data), (size,), generator=self.generator)
+        return self.gather(idx)
+
+    def _samples(self, size):
+        while True:
+            batch = self.sample(size)
+            yield batch, self.generator.get_state()
+
+    def stream(self, size):
+        """Endless random batches of `size`, prefetched; close() it when done"""
+        self.generator.set_state(self.sample_state)
+        return SampleStream(self, size)
+
+    def state_dict(self):
+        """Shuffle seed and random sampling position, as of the last consumed batch"""
+        return {"seed": self.seed, "generator": self.sample_state.clone(), "draws": self.draws}
+
+    def load_state_dict(self, state):
+        """
+        Continue the shuffle order and the random sampling stream of `state`
+
+        The generator state is the one of the rank that saved it (rank 0);
+        the other ranks reseed and replay the same number of draws.
+        """
+        self.seed = state["seed"]
+        self.draws = state["draws"]
+        if self.rank == 0:
+            self.generator.set_state(state["generator"])
+        else:
+            self.generator.manual_seed(self.seed + self.rank)
+            for _ in range(self.draws):
+                torch.randint(len(self.data), (self.batch_size,), generator=self.generator)
+        self.sample_state = self.generator.get_state()
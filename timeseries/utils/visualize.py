@@ -3,6 +3,8 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import time
 
+from timeseries.utils.band import BandBuffer, compute_bands
+
 
 class Dashboard:
     def __init__(self, dataset):
@@ -13,25 +15,23 @@ class Dashboard:
         self.fig, self.ax = self.init_figure()
         self.data = None
         self.pred = None
-        self.upper = None
-        self.lower = None
 
-        self.preds = self.initialize()
+        # window history drawn by `visualize`, filled in place per batch
+        self.data_buffer = np.empty(dataset.data_len + self.sequence)
+        self.pred_buffer = np.empty(dataset.data_len + self.sequence)
+        self.windows = 0
 
-        self.band_flag = False
-        self.upper_band = list()
-        self.lower_band = list()
-        
-        self.area_up1 = None
-        self.area_upper = None
-        self.area_lower = None
-        self.labels = self.initialize()
-        self._time = None
+        self.bands = BandBuffer(dataset.data_len)
         self.time = self.initialize(dataset.time)
-        self.label = dataset.label
         self.scope = 240
         self.idx = 0
 
+        # live view history, one row (data, preds...) per step
+        self.steps = np.full((self.scope, 1 + self.sequence), np.nan)
+        self.times = np.empty(self.scope, dtype=object)
+        self.step_bands = BandBuffer(self.scope)
+        self.lines = None
+
     def init_figure(self):
         fig, ax = plt.subplots(figsize=(20, 6), facecolor="lightgray")
         fig.suptitle(self.dataset.title, fontsize=25)
@@ -40,6 +40,10 @@ class Dashboard:
 
         return fig, ax
 
+    def ylim(self):
+        """Value range of the first feature, the one the dashboard draws"""
+        return np.ravel(self.dataset.min)[0], np.ravel(self.dataset.max)[0]
+
     def concat(self, target, x, denormalize=False):
         if denormalize is True:
             x = self.dataset.denormalize(x)
@@ -61,54 +65,57 @@ class Dashboard:
         
         return value
 
-    def data_concat(self, target, x, cond):
-        if target is None:
-            return x[:cond]
-        
-        return np.concatenate((target[:-cond], x[:cond + 1]))
-
-    def pred_concat(self, target, y, cond):
-        if target is None:
-            return y
-        
-        length = len(target) - self.sequence + cond
-        return np.concatenate((target[:length + 2], y[cond + 1:]))
+    def reserve(self, length):
+        """Grow the history buffers by doubling when a run outlasts `data_len` windows"""
+        if length <= len(self.pred_buffer):
+            return
+        capacity = max(length, 2 * len(self.pred_buffer))
+        self.data_buffer = np.concatenate((self.data_buffer, np.empty(capacity - len(self.data_buffer))))
+        self.pred_buffer = np.concatenate((self.pred_buffer, np.empty(capacity - len(self.pred_buffer))))
+
+    def extend_history(self, x, y, cond):
+        """
+        Append a batch of consecutive (window, seq_len) data / pred windows
+
+        Window `i` keeps its first data step and its step `cond + 1` of
+        prediction once the next window arrives; the last window shows its
+        data up to `cond` and its prediction from `cond + 1`. Every window
+        is written at its offset in the preallocated buffers, so a batch
+        costs a few slice assignments instead of copying the history.
+        """
+        first, last = self.windows, self.windows + len(x) - 1
+        self.reserve(last + self.sequence)
+
+        if first == 0:
+            self.pred_buffer[: cond + 1] = y[0, : cond + 1]
+        self.pred_buffer[first + cond + 1 : last + cond + 1] = y[:-1, cond + 1]
+        self.pred_buffer[last + cond + 1 : last + self.sequence] = y[-1, cond + 1 :]
+
+        if last == 0:
+            self.data_buffer[:cond] = x[0, :cond]
+            length = cond
+        else:
+            skip = 1 if first == 0 else 0
+            self.data_buffer[first - 1 + skip : last - 1] = x[skip:-1, 0]
+            self.data_buffer[last - 1 : last + cond] = x[-1, : cond + 1]
+            length = last + cond
+
+        self.windows = last + 1
+        self.data = self.data_buffer[:length]
+        self.pred = self.pred_buffer[: last + self.sequence]
     
     def visualize(self, x, y, cond, normalize=True):
         if normalize:
             x = self.dataset.denormalize(x)
             y = self.dataset.denormalize(y)
 
-        x = x[0].detach().numpy().ravel()
-        y = y[0].detach().numpy().ravel()
-        
-        self.data = self.data_concat(self.data, x, cond)
-        self.pred = self.pred_concat(self.pred, y, cond)
-
-        if self.band_flag is False:
-            self.area_up1 = y[:cond]
-            self.area_up2 = y[:cond]
-            self.area_up3 = y[:cond]
-            self.area_down1 = y[:cond]
-            self.area_down2 = y[:cond]
-            self.area_down3 = y[:cond]
-            self.band_flag = True
-            
-            self.upper = y[:cond]
-            self.lower = y[:cond]
+        x = x.detach().numpy()[..., 0]
+        y = y.detach().numpy()[..., 0]
 
-        std = y.std()
-        median = np.median(y[cond:])
+        self.extend_history(x, y, cond)
 
-        self.upper = np.append(self.upper, y[cond:].max())
-        self.lower = np.append(self.lower, y[cond:].min())
-
-        self.area_up1 = np.append(self.area_up1, median + 1 * std)
-        self.area_up2 = np.append(self.area_up2, median + 2 * std)
-        self.area_up3 = np.append(self.area_up3, median + 3 * std)
-        self.area_down1 = np.append(self.area_down1, median - 1 * std)
-        self.area_down2 = np.append(self.area_down2, median - 2 * std)
-        self.area_down3 = np.append(self.area_down3, median - 3 * std)
+        self.bands.extend(compute_bands(y, cond))
+        bands = self.bands.values()
 
         fig, ax = self.fig, self.ax
         try:
@@ -119,10 +126,10 @@ class Dashboard:
             plt.axvspan(length - self.sequence, length - self.sequence + cond, facecolor='green', alpha=0.01)
             plt.axvspan(length - self.sequence + cond, length, facecolor='gray', alpha=0.5)
 
-            length = np.arange(len(self.area_up1[cond:]))
-            ax.fill_between(length, self.area_down3[cond:], self.area_up3[cond:], color='red', alpha=0.1)
-            ax.fill_between(length, self.area_down2[cond:], self.area_up2[cond:], color='blue', alpha=0.2)
-            ax.fill_between(length, self.area_down1[cond:], self.area_up1[cond:], color='blue', alpha=0.3)
+            length = np.arange(self.bands.count - len(self.bands), self.bands.count)
+            ax.fill_between(length, bands["down3"], bands["up3"], color='red', alpha=0.1)
+            ax.fill_between(length, bands["down2"], bands["up2"], color='blue', alpha=0.2)
+            ax.fill_between(length, bands["down1"], bands["up1"], color='blue', alpha=0.3)
             ax.plot(self.data[cond:], "r-", linewidth=2, alpha=0.6, label="data")
             ax.plot(self.pred[cond:], "b-", linewidth=3, alpha=0.2, label="pred")
 
@@ -130,7 +137,7 @@ class Dashboard:
             xtick = np.arange(0, self.scope * 2, 12)
             values = self.time[0:self.scope * 2:12]
 
-            plt.ylim(self.dataset.min, self.dataset.max)
+            plt.ylim(*self.ylim())
             plt.xticks(xtick, values, rotation=30)
 
             fig.show()
@@ -140,82 +147,75 @@ class Dashboard:
             raise
         
 
-    def _visualize(self, time, data, pred):
-        self.idx += 1
-        try:
-            fig, ax = self.fig, self.ax
-
-            data = data[0].detach().numpy().ravel()
-            pred = pred[0].detach().numpy().ravel()
-            
-            def concat(target, x, loc=None):
-                if target is None:
-                    if loc is None:
-                        target = x[:6]
-                    else:
-                        target = x[:loc]
-                else:
-                    if loc is None:
-                        target = np.concatenate((target, x[6:7]))
-                    else:
-                        target = np.concatenate((target, x[loc:loc+1]))
-                return target
-            
-            self.data = concat(self.data, data)
-            min_scope = max(self.sequence, self.data.size - self.scope + 1)
-            if self.area_lower is None:
-                self.area_lower = pred[:6]
-                self.area_upper = pred[:6]
+    def update(self, time, data, pred):
+        """Record one step of the live view without drawing"""
+        data = np.asarray(data).reshape(self.sequence, -1)[:, 0]
+        pred = np.asarray(pred).reshape(self.sequence, -1)[:, 0]
 
-            min_axvln = min(0, self.area_lower.size)
+        slot = self.idx % self.scope
+        self.steps[slot, 0] = data[6]
+        self.steps[slot, 1:] = pred
+        self.times[slot] = str(time)
+        self.step_bands.extend(compute_bands(pred[None], 6))
+        self.idx += 1
 
-            self.area_upper = np.append(self.area_upper, pred[6:].max())
-            self.area_lower = np.append(self.area_lower, pred[6:].min())
+    def init_lines(self):
+        """Create the live view artists once; `render` only moves their data"""
+        ax = self.ax
+        ax.grid()
+        ax.axvspan(10, 40, facecolor="gray")
+
+        self.lines = {
+            "preds": [
+                ax.plot([], [], alpha=0.4, linewidth=1, label=f"Preds {i}")[0]
+                for i in range(7, self.sequence)
+            ],
+            "data": ax.plot([], [], "r-", alpha=0.6, linewidth=4, label="Actual Data")[0],
+            "upper": ax.plot([], [], "b-", linewidth=2, alpha=0.6, label="Upper")[0],
+            "lower": ax.plot([], [], "b-", linewidth=2, alpha=0.6, label="Lower")[0],
+        }
+        ax.set_xlim(0, self.scope)
+        ax.set_ylim(*self.ylim())
+        ax.set_xticks(np.arange(0, self.scope, 12))
+        ax.legend()
+        self.fig.show()
+
+    def render(self):
+        """Redraw the last `scope` steps by updating the existing lines"""
+        if self.lines is None:
+            self.init_lines()
+
+        n = min(self.idx, self.scope)
+        order = (np.arange(self.idx - n, self.idx)) % self.scope
+        steps, times = self.steps[order], self.times[order]
+        bands = self.step_bands.values()
+        length = np.arange(n)
+
+        for i, line in enumerate(self.lines["preds"], 7):
+            line.set_data(length, steps[:, 1 + i])
+        self.lines["data"].set_data(length, steps[:, 0])
+        self.lines["upper"].set_data(length, bands["upper"])
+        self.lines["lower"].set_data(length, bands["lower"])
+
+        ticks = np.arange(0, self.scope, 12)
+        self.ax.set_xticklabels(
+            [times[t] if t < n else "" for t in ticks], rotation=30
+        )
+
+        self.fig.canvas.draw_idle()
+        self.fig.canvas.flush_events()
 
-            ax.clear()
-            ax.grid()
-            
-            for i in range(self.sequence):
-                self.labels[i] = concat(self.labels[i], self.label[self.idx, i], loc=0)
-                self.preds[i] = np.append(self.preds[i], pred[i])
-            
-            plt.axvspan(10, 40, facecolor='gray')
-
-            # print(self.dataset.label[min_scope:min_scope+self.scope, :, 0])
-            for i in range(7, self.sequence):
-                # ax.plot(self.labels[i][min_scope:], alpha=0.4, linewidth=i//2, label=f"Label {i}")
-                # print(self.labels[i][min_scope:])
-                ax.plot(self.preds[i][min_scope:], alpha=0.4, linewidth=1, label=f"Preds {i}")
-                
-                
-            # print(f"Pred length : {len(self.pred5)}")
-            # ax.vlines(x=min_axvln, ymin=pred[4:].min(), ymax=pred[4:].max(), linewidth=3)
-            ax.plot(self.data[min_scope:], "r-", alpha=0.6, linewidth=4, label="Actual Data")
-            # ax.plot(self.pred2[min_scope:], alpha=0.4, label="Pred 3")
-            # ax.plot(self.pred3[min_scope:], alpha=0.4, label="Pred 6")
-            # ax.plot(self.pred4[min_scope:], alpha=0.4, label="Pred 9")
-            # ax.plot(self.pred5[min_scope:], alpha=0.4, label="Pred 11")
-            ax.plot(self.area_upper[min_scope:], "b-", linewidth=2, alpha=0.6, label="Upper")
-            ax.plot(self.area_lower[min_scope:], "b-", linewidth=2, alpha=0.6, label="Lower")
-            ax.legend()
-            
-            # ax.fill_between(np.arange(10), self.area_lower[min_scope:], self.area_upper[min_scope:], color='lightgray', alpha=0.5)
-            
-            xtick = np.arange(0, self.scope, 12)
-            values = self.time[min_scope:min_scope + self.scope:12]
-            plt.xticks(xtick, values, rotation=30)
+    def _visualize(self, time, data, pred):
+        data = data[0].detach().numpy()
+        pred = pred[0].detach().numpy()
+        try:
+            self.update(time, data, pred)
+            self.render()
+        except (KeyboardInterrupt, AttributeError) as e:
+            plt.close(self.fig)
+            raise
 
-            plt.ylim(self.dataset.min, self.dataset.max)
-            ax.relim()
-            fig.legend()
 
-            fig.show()
-            fig.canvas.draw()
-            fig.canvas.flush_events()
-        except (KeyboardInterrupt, AttributeError) as e:
-            fig.close()
-            raise 
-        
 def plt_loss(gen_loss, dis_loss, path, num):
     idx = num * 1000
     gen_loss = np.clip(np.array(gen_loss), a_min=-1500, a_max=1500)